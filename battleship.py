@@ -1,44 +1,11 @@
 # Battleship
 # Author: Jan Zalewski
 
-import random, time, sys
+import os, random, time
+from array import array
 from enum import Enum
 
-###### Additional options ######
-# AI plays as player
-PLAYER_AI = False
-
-# total suspension time in seconds
-SUSP_TIME = 2
-
-# AI's turn time in seconds
-TURN_TIME = 1
-
-# define game language ('en', 'pl')
-LANGUAGE = 'en'
-################################
-
-
-# In game texts in two languages (English, Polish)
-TEXTS = \
-{
-    ('your ships', 'en'): 'Your ships', ('your ships', 'pl'): 'Twoje statki', \
-    ('enemy ships', 'en'): 'Enemy ships', ('enemy ships', 'pl'): 'Statki przeciwnika', \
-    ('who starts', 'en'): 'Choosing who starts first', ('who starts', 'pl'): 'Losowanie zaczynającego pierwszą turę', \
-    ('player starts', 'en'): 'Player starts', ('player starts', 'pl'): 'Gracz zaczyna', \
-    ('enemy starts', 'en'): 'Enemy starts', ('enemy starts', 'pl'): 'Przeciwnik zaczyna', \
-    ('your turn', 'en'): 'Your turn', ('your turn', 'pl'): 'Twoja tura', \
-    ('enemy turn', 'en'): 'Enemy turn', ('enemy turn', 'pl'): 'Tura przeciwnika', \
-    ('player ai', 'en'): 'Player AI', ('player ai', 'pl'): 'AI gracza', \
-    ('missed', 'en'): 'Missed.', ('missed', 'pl'): 'Pudło.', \
-    ('hit', 'en'): 'Hit!', ('hit', 'pl'): 'Trafiony!', \
-    ('destroyed', 'en'): 'Destroyed!', ('destroyed', 'pl'): 'Trafiony zatopiony!', \
-    ('win', 'en'): 'You win!', ('win', 'pl'): 'Wygrałeś!', \
-    ('loose', 'en'): 'You loose!', ('loose', 'pl'): 'Przegrałeś!', \
-    ('play again', 'en'): 'Do you want to play again? (Y/N)?', ('play again', 'pl'): 'Chcesz zagrać jeszcze raz (T/N)?', \
-    ('thanks', 'en'): 'Thanks for playing!', ('thanks', 'pl'): 'Dzięki za grę!'
-}
-
+# template of the default board used by format_grid()
 GRID = \
 """
 {0}
@@ -59,8 +26,6 @@ ____________________________
 ____________________________
 """
 
-LETTERS = 'ABCDEFGHIJ'
-
 
 class Direction(Enum):
     """ Enum for ships direction with additional static methods. """
@@ -69,9 +34,9 @@ class Direction(Enum):
     VERTICAL = 2
 
     @classmethod
-    def get_random_direction(cls):
+    def get_random_direction(cls, rng = random):
         """ Return horizontal or vertical direction. """
-        return random.choice((cls.HORIZONTAL, cls.VERTICAL))
+        return rng.choice((cls.HORIZONTAL, cls.VERTICAL))
 
     @classmethod
     def what_direction(cls, coords1, coords2):
@@ -87,6 +52,20 @@ class Direction(Enum):
             return cls.NONE
 
 
+class Strategy(Enum):
+    """ Enum for the way Player_AI chooses position (see STRATEGIES). MONTE_CARLO chooses it
+        also while hit ship is not destroyed, others only when no ship is hit. """
+
+    # random position from possible moves
+    RANDOM = 0
+    # position covered by the largest number of possible ship placements
+    DENSITY = 1
+    # position most often occupied in sampled fleets consistent with previous shots
+    MONTE_CARLO = 2
+    # random position from cells of a lattice which every remaining ship has to cover
+    PARITY = 3
+
+
 class Report(Enum):
     """ Enum for reporting what happend after shooting. """
     
@@ -96,11 +75,77 @@ class Report(Enum):
     MISSED = 3
 
 
+class Metrics:
+    """ Counters and timers of hot paths, collected only when enabled with enable_metrics(). """
+
+    def __init__(self):
+        # generated fleets, how many times placing had to start again and time spent on it
+        self.fleets = 0
+        self.fleet_restarts = 0
+        self.fleet_time = 0.0
+        # random ship locations rejected because they touched ships already placed
+        self.ship_retries = 0
+        # number of shots and time spent on them for every report
+        self.shots = {report : 0 for report in Report}
+        self.shot_time = {report : 0.0 for report in Report}
+        # number of calls to get_near_possible_positions()
+        self.neighbour_queries = 0
+        # number of AI decisions (get_shoot_position() calls), their total and longest time
+        self.ai_turns = 0
+        self.ai_time = 0.0
+        self.ai_max_time = 0.0
+
+    def __repr__(self):
+        lines = ['fleets: {} (restarts: {}, ship retries: {}, {:.3f} s)'.format(
+            self.fleets, self.fleet_restarts, self.ship_retries, self.fleet_time)]
+        for report in Report:
+            lines.append('shots {}: {} ({:.3f} s)'.format(report.name, self.shots[report], self.shot_time[report]))
+        lines.append('neighbour queries: {}'.format(self.neighbour_queries))
+        lines.append('AI turns: {} ({:.3f} s, longest {:.6f} s)'.format(self.ai_turns, self.ai_time, self.ai_max_time))
+        return '\n'.join(lines)
+
+    def add_fleet(self, restarts, seconds):
+        self.fleets += 1
+        self.fleet_restarts += restarts
+        self.fleet_time += seconds
+
+    def add_shot(self, report, seconds):
+        self.shots[report] += 1
+        self.shot_time[report] += seconds
+
+    def add_ai_turn(self, seconds):
+        self.ai_turns += 1
+        self.ai_time += seconds
+        self.ai_max_time = max(self.ai_max_time, seconds)
+
+
+# Metrics object collecting data or None if instrumentation is disabled
+METRICS = None
+
+
+def enable_metrics():
+    """ Start collecting metrics. Return new Metrics object. """
+    global METRICS
+    METRICS = Metrics()
+    return METRICS
+
+
+def disable_metrics():
+    """ Stop collecting metrics. Return Metrics object with collected data. """
+    global METRICS
+    metrics, METRICS = METRICS, None
+    return metrics
+
+
 class Ship:
     """ Class representing single ship. """
+
+    __slots__ = ('size', 'active_units', 'direction', 'cells', 'width')
     
-    def __init__(self, coords, size, direction = Direction.NONE):
+    def __init__(self, coords, size, direction = Direction.NONE, width = 10):
         self.size = size
+        # width of the board, needed to convert cell indexes to coordinates
+        self.width = width
         
         # number of not yet destroyed parts of the ship
         self.active_units = size
@@ -111,37 +156,39 @@ class Ship:
         else:
             self.direction = Direction.NONE
 
-        # initialize every part of the ship with coordinates
-        x, y = coords
-        self.body_coords = []
-        for i in range(size):
-            if direction == Direction.HORIZONTAL:
-                self.body_coords.append((x + i, y))
-            elif direction == Direction.VERTICAL:
-                self.body_coords.append((x, y + i))
-            else:
-                self.body_coords.append((x, y))
+        # initialize every part of the ship with cell index (y * width + x)
+        if direction == Direction.HORIZONTAL:
+            step = 1
+        elif direction == Direction.VERTICAL:
+            step = width
+        else:
+            step = 0
+        head = coords[1] * width + coords[0]
+        self.cells = tuple(head + i * step for i in range(size))
 
     def __repr__(self):
         return str(self.body_coords)
 
+    @property
+    def body_coords(self):
+        """ List of coordinates of every part of the ship. """
+        return [divmod(cell, self.width)[::-1] for cell in self.cells]
+
     def __iter__(self):
-        self.n = 0
-        return self
+        # iterate over cell indexes, iterator is independent so ship can be
+        # iterated by many loops at the same time
+        return iter(self.cells)
 
-    def __next__(self):
-        if self.n >= self.size:
-            raise StopIteration      
-        index = self.n
-        self.n += 1
-        return self.body_coords[index]
+    def __contains__(self, cell):
+        """ Check if ship has unit in cell with given index. Doesn't change ship's state. """
+        return cell in self.cells
 
     def get_coords(self, index = 0):
-        return self.body_coords[index]
+        return divmod(self.cells[index], self.width)[::-1]
 
     def get_tail(self):
         """ Return ship's last element coordinates. """
-        return self.body_coords[self.size - 1]
+        return self.get_coords(self.size - 1)
 
     def get_size(self):
         return self.size
@@ -155,190 +202,562 @@ class Ship:
         self.active_units -= 1
 
 
+# Flags describing state of a cell. Board keeps state of all its cells in bytearray.
+CELL_SHIP = 1
+CELL_HIDDEN = 2
+CELL_MISSED = 4
+CELL_DESTROYED = 8
+
+
+def get_cell_value(state):
+    """ Return visible value of the cell with given state. """
+    if state & CELL_HIDDEN:
+        return '_'
+    elif state & CELL_MISSED:
+        return '.'
+    elif state & CELL_DESTROYED:
+        return 'X'
+    elif state & CELL_SHIP:
+        return 'O'
+    else:
+        return '_'
+
+
+# cell state -> visible value
+CELL_VALUES = [get_cell_value(state) for state in range(16)]
+
+
 class Cell:
     """ Class representing single cell on board. Cell can have various states
-        like: hidden, empty, missed, ship, destroyed. """
+        like: hidden, empty, missed, ship, destroyed. Cell doesn't keep its state,
+        it changes flags in board's bytearray, visible value is derived only when needed. """
+
+    __slots__ = ('cells', 'index')
     
-    def __init__(self):
-        self.__hidden = False
-        self.__empty = True
-        self.__missed = False
-        self.__ship = False
-        self.__destroyed = False
-        self.__value = '_'
+    def __init__(self, cells = None, index = 0):
+        # standalone cell gets its own one byte state
+        self.cells = bytearray(1) if cells is None else cells
+        self.index = index
 
     def __repr__(self):
-        return self.__value
+        return self.get_value()
 
     def is_empty(self):
-        return self.__empty
+        return not self.cells[self.index] & (CELL_SHIP | CELL_DESTROYED)
 
     def is_ship(self):
-        return self.__ship
+        return bool(self.cells[self.index] & CELL_SHIP)
 
     def is_destroyed(self):
-        return self.__destroyed
+        return bool(self.cells[self.index] & CELL_DESTROYED)
 
     def set_hidden(self):
-        self.__hidden = True
-        self.__update()
+        self.cells[self.index] |= CELL_HIDDEN
 
     def show(self):
-        self.__hidden = False
-        self.__update()
+        self.cells[self.index] &= ~CELL_HIDDEN
 
     def set_missed(self):
-        self.__hidden = False
-        self.__missed = True
-        self.__update()
+        self.cells[self.index] = self.cells[self.index] & ~CELL_HIDDEN | CELL_MISSED
 
     def set_ship(self):
-        self.__ship = True
-        self.__empty = False
-        self.__update()
+        self.cells[self.index] |= CELL_SHIP
 
     def set_destroyed(self):
-        self.__hidden = False
-        self.__ship = False
-        self.__destroyed = True
-        self.__update()
+        self.cells[self.index] = self.cells[self.index] & ~(CELL_HIDDEN | CELL_SHIP) | CELL_DESTROYED
 
     def get_value(self):
-        return self.__value
-
-    # update visible value of the cell based on class's boolean variables
-    def __update(self):
-        if self.__hidden == True:
-            self.__value = '_'
-        elif self.__missed == True:
-            self.__value = '.'
-        elif self.__destroyed == True:
-            self.__value = 'X'
-        elif self.__ship == True:
-            self.__value = 'O'
-        elif self.__empty == True:
-            self.__value = '_'
-            
+        return CELL_VALUES[self.cells[self.index]]
+
+
+def to_index(coords):
+    """ Return cell index used by bit masks e.g. 11 = to_index((1, 1)) """
+    x, y = coords
+    return y * 10 + x
+
+
+def get_column_name(x):
+    """ Return name of column with given x coordinate: 'A' - 'Z', then 'AA', 'AB', ... """
+    name = ''
+    x += 1
+    while x:
+        x, letter = divmod(x - 1, 26)
+        name = chr(ord('A') + letter) + name
+    return name
+
+
+class Lazy_Table:
+    """ Read only sequence that computes its items when they are accessed. Used by Geometry
+        instead of lists with value for every cell on boards too large to keep such lists. """
+
+    __slots__ = ('function', 'length')
+
+    def __init__(self, function, length):
+        self.function = function
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.length:
+            raise IndexError('cell index out of range')
+        return self.function(index)
+
+
+class Indexed_Set:
+    """ Set with O(1) add, remove and uniform random choice. Items are kept in a list (removed
+        item is replaced by the last one) and their indexes in the list in a dict, so choosing
+        random item doesn't need copying the set into a list. Used for small sets, sets of
+        cells of the whole board are Cell_Sets. """
+
+    __slots__ = ('items', 'indexes')
+
+    def __init__(self, items = ()):
+        self.items = list(dict.fromkeys(items))
+        self.indexes = dict(zip(self.items, range(len(self.items))))
+
+    def __repr__(self):
+        return 'Indexed_Set({})'.format(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self.indexes
+
+    def __iter__(self):
+        # set must not be changed while it's iterated
+        return iter(self.items)
+
+    def add(self, item):
+        if item not in self.indexes:
+            self.indexes[item] = len(self.items)
+            self.items.append(item)
+
+    def remove(self, item):
+        """ Remove item, raise KeyError if it is not in the set. """
+        index = self.indexes.pop(item)
+        last = self.items.pop()
+        if index < len(self.items):
+            self.items[index] = last
+            self.indexes[last] = index
+
+    def discard(self, item):
+        if item in self.indexes:
+            self.remove(item)
+
+    def clear(self):
+        self.items.clear()
+        self.indexes.clear()
+
+    def choice(self, rng = random):
+        """ Return random item, raise IndexError if set is empty. """
+        return rng.choice(self.items)
+
+
+def new_index_array(max_value, length = 0):
+    """ Return array of given length filled with zeros, its items are the smallest
+        unsigned integers that can hold max_value. """
+    typecode = 'B' if max_value < 1 << 8 else 'H' if max_value < 1 << 16 else 'I'
+    return array(typecode, bytes(length * array(typecode).itemsize))
+
+
+class Cell_Set:
+    """ Set of cell indexes from range(size) with O(1) add, remove and uniform random choice,
+        the same as Indexed_Set, but kept in two arrays: cells (removed cell is replaced by
+        the last one) and position of every cell in cells + 1 (0 if cell is not in the set).
+        Cell takes few bytes, so even set of all cells of 1000x1000 board is small. """
+
+    __slots__ = ('cells', 'positions')
+
+    def __init__(self, size, cells = ()):
+        self.cells = new_index_array(size)
+        self.positions = new_index_array(size, size)
+        for cell in cells:
+            self.add(cell)
+
+    @classmethod
+    def full(cls, size):
+        """ Return set of all cells from range(size). """
+        cell_set = cls.__new__(cls)
+        typecode = new_index_array(size).typecode
+        cell_set.cells = array(typecode, range(size))
+        cell_set.positions = array(typecode, range(1, size + 1))
+        return cell_set
+
+    def __repr__(self):
+        return 'Cell_Set({}, {})'.format(len(self.positions), self.cells.tolist())
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, cell):
+        return 0 <= cell < len(self.positions) and self.positions[cell] != 0
+
+    def __iter__(self):
+        # set must not be changed while it's iterated
+        return iter(self.cells)
+
+    def add(self, cell):
+        if not self.positions[cell]:
+            self.cells.append(cell)
+            self.positions[cell] = len(self.cells)
+
+    def remove(self, cell):
+        """ Remove cell, raise KeyError if it is not in the set. """
+        position = self.positions[cell]
+        if not position:
+            raise KeyError(cell)
+        self.positions[cell] = 0
+        last = self.cells.pop()
+        if position <= len(self.cells):
+            self.cells[position - 1] = last
+            self.positions[last] = position
+
+    def discard(self, cell):
+        if cell in self:
+            self.remove(cell)
+
+    def clear(self):
+        for cell in self.cells:
+            self.positions[cell] = 0
+        del self.cells[:]
+
+    def choice(self, rng = random):
+        """ Return random cell, raise IndexError if set is empty. """
+        return rng.choice(self.cells)
+
+
+class Placement:
+    """ Single possible location of the ship on the board with precomputed bit masks
+        (masks are None on boards too large for bit masks, see Geometry). """
+
+    def __init__(self, coords, size, direction, geometry = None):
+        geometry = GEOMETRY if geometry is None else geometry
+        self.coords = coords
+        self.size = size
+        self.direction = direction
+        ship = Ship(coords, size, direction, geometry.width)
+        # cell indexes of ship's units
+        self.cells = ship.cells
+        # mask of ship's units
+        self.body = None
+        # mask of ship's units and cells around them, where no other ship can be placed
+        self.halo = None
+        if geometry.halo_masks is not None:
+            self.body = self.halo = 0
+            for index in self.cells:
+                self.body |= 1 << index
+                self.halo |= geometry.halo_masks[index]
+
+    def __repr__(self):
+        return 'Placement({}, {}, {})'.format(self.coords, self.size, self.direction)
+
+
+def get_placements(size, geometry = None):
+    """ Return list of all placements of ship with given size that fit on the board. """
+    geometry = GEOMETRY if geometry is None else geometry
+    placements = []
+    for x in range(geometry.width):
+        for y in range(geometry.height):
+            if size == 1:
+                placements.append(Placement((x, y), size, Direction.NONE, geometry))
+                continue
+            if x + size <= geometry.width:
+                placements.append(Placement((x, y), size, Direction.HORIZONTAL, geometry))
+            if y + size <= geometry.height:
+                placements.append(Placement((x, y), size, Direction.VERTICAL, geometry))
+    return placements
+
+
+# sizes of all ships placed on board, largest first:
+# 1 ship of size 4, 2 ships of size 3, 3 ships of size 2, 4 ships of size 1
+FLEET = (4, 3, 3, 2, 2, 2, 1, 1, 1, 1)
+
+
+class Geometry:
+    """ Dimensions of the board and sizes of ships placed on it, with tables derived from them.
+        Cell index is y * width + x. Per cell tables are lists on small boards and Lazy_Tables
+        on large ones, so creating a 1000x1000 board doesn't build millions of tuples. Bit masks
+        and tables of all placements are kept only for boards small enough (Bit_Board,
+        Strategy.MONTE_CARLO), placements are built on the first use. """
+
+    # maximum width and height of the board
+    MAX_SIZE = 1000
+    # boards with more cells compute per cell tables on access
+    TABLE_AREA = 10000
+    # boards with more cells have no bit masks
+    MASK_AREA = 1024
+    # number of random locations tried for a ship (on boards without bit masks) before
+    # placing the whole fleet starts again
+    TRIES = 1000
+    # number of times placing the whole fleet starts again before fleet is considered not fitting
+    RESTARTS = 100
+
+    def __init__(self, width = 10, height = 10, fleet = FLEET):
+        if not (1 <= width <= self.MAX_SIZE and 1 <= height <= self.MAX_SIZE):
+            raise ValueError('Board size must be between 1 and {}'.format(self.MAX_SIZE))
+        fleet = tuple(sorted(fleet, reverse = True))
+        if not fleet or fleet[-1] < 1 or fleet[0] > max(width, height):
+            raise ValueError("Ships don't fit on the board")
+        # ship of size s with cells to the right and below it takes (s + 1) x 2 cells of the board
+        # enlarged by one row and column, these areas of ships that don't touch don't overlap
+        if sum(2 * (size + 1) for size in fleet) > (width + 1) * (height + 1):
+            raise ValueError("Ships don't fit on the board")
+        self.width = width
+        self.height = height
+        self.area = width * height
+        # sizes of all ships, largest first
+        self.fleet = fleet
+        self.columns = [get_column_name(x) for x in range(width)]
+
+        # cell index -> coordinates and position e.g. (1, 1) and 'B2'
+        self.coords = self.__table(lambda i: (i % width, i // width))
+        self.positions = self.__table(lambda i: self.columns[i % width] + str(i // width + 1))
+        # cell index -> tuple of indexes of neighbouring cells (left, right; up, down; diagonals)
+        self.horizontal_neighbours = self.__table(lambda i: self.get_neighbours(i, ((-1, 0), (1, 0))))
+        self.vertical_neighbours = self.__table(lambda i: self.get_neighbours(i, ((0, -1), (0, 1))))
+        self.orthogonal_neighbours = self.__table(
+            lambda i: self.horizontal_neighbours[i] + self.vertical_neighbours[i])
+        self.diagonal_neighbours = self.__table(
+            lambda i: self.get_neighbours(i, ((-1, -1), (1, -1), (-1, 1), (1, 1))))
+        self.halo_neighbours = self.__table(lambda i: self.orthogonal_neighbours[i] + self.diagonal_neighbours[i])
+
+        # cell index -> bit mask of the cell and its eight neighbours, bit mask with all cells set
+        self.halo_masks = None
+        self.full_mask = None
+        if self.area <= self.MASK_AREA:
+            self.halo_masks = [sum(1 << j for j in self.halo_neighbours[i] + (i,)) for i in range(self.area)]
+            self.full_mask = (1 << self.area) - 1
+
+        self.__placements = None
+        self.__placements_by_cell = None
+
+    def __repr__(self):
+        return 'Geometry({}, {}, {})'.format(self.width, self.height, self.fleet)
+
+    def __eq__(self, other):
+        return isinstance(other, Geometry) and \
+               (self.width, self.height, self.fleet) == (other.width, other.height, other.fleet)
+
+    def __hash__(self):
+        return hash((self.width, self.height, self.fleet))
+
+    def __table(self, function):
+        if self.area <= self.TABLE_AREA:
+            return [function(i) for i in range(self.area)]
+        return Lazy_Table(function, self.area)
+
+    def to_index(self, coords):
+        x, y = coords
+        return y * self.width + x
+
+    def get_neighbours(self, index, offsets):
+        """ Return tuple of indexes of cells shifted from given cell by offsets, which fit on the board. """
+        x, y = index % self.width, index // self.width
+        return tuple((y + dy) * self.width + x + dx for dx, dy in offsets
+                     if 0 <= x + dx < self.width and 0 <= y + dy < self.height)
+
+    def get_placements(self):
+        """ Return dict: ship size -> list of all its placements. """
+        if self.__placements is None:
+            self.__placements = {size : get_placements(size, self) for size in set(self.fleet)}
+        return self.__placements
+
+    def get_placements_by_cell(self):
+        """ Return dict: ship size -> list with indexes of placements (in get_placements()[size])
+            covering every cell. """
+        if self.__placements_by_cell is None:
+            self.__placements_by_cell = {size : [[] for _ in range(self.area)] for size in self.get_placements()}
+            for size, placements in self.get_placements().items():
+                for i, placement in enumerate(placements):
+                    for index in placement.cells:
+                        self.__placements_by_cell[size][index].append(i)
+        return self.__placements_by_cell
+
+    def get_random_fleet(self, rng = random):
+        """ Return list of placements of all ships, see get_random_fleet().
+            Raise ValueError if fleet couldn't be placed after RESTARTS tries. """
+        start = time.perf_counter() if METRICS is not None else 0
+        place = self.__place_from_placements if self.halo_masks is not None else self.__place_randomly
+        for restarts in range(self.RESTARTS):
+            fleet = place(rng)
+            # previous ships left no room (practically never happens on default board), start again
+            if fleet is None:
+                continue
+            if METRICS is not None:
+                METRICS.add_fleet(restarts, time.perf_counter() - start)
+            return fleet
+        raise ValueError("Ships don't fit on the board")
+
+    def __place_from_placements(self, rng):
+        fleet = []
+        blocked = 0
+        placements = self.get_placements()
+        for size in self.fleet:
+            legal = [placement for placement in placements[size] if not placement.body & blocked]
+            if not legal:
+                return None
+            placement = rng.choice(legal)
+            fleet.append(placement)
+            blocked |= placement.halo
+        return fleet
+
+    def __place_randomly(self, rng):
+        fleet = []
+        # cells taken by placed ships and cells around them
+        blocked = set()
+        for size in self.fleet:
+            # numbers of horizontal and vertical placements, ship may be longer than one side
+            horizontal = max(0, self.width - size + 1) * self.height if size > 1 else self.area
+            vertical = self.width * max(0, self.height - size + 1) if size > 1 else 0
+            for tries in range(self.TRIES):
+                # every placement is equally likely, so accepted one is uniform among legal placements
+                i = rng.randrange(horizontal + vertical)
+                if i < horizontal:
+                    direction = Direction.HORIZONTAL if size > 1 else Direction.NONE
+                    y, x = divmod(i, self.width - size + 1)
+                else:
+                    direction = Direction.VERTICAL
+                    y, x = divmod(i - horizontal, self.width)
+                placement = Placement((x, y), size, direction, self)
+                if not any(index in blocked for index in placement.cells):
+                    break
+            else:
+                if METRICS is not None:
+                    METRICS.ship_retries += self.TRIES
+                return None
+            if METRICS is not None:
+                METRICS.ship_retries += tries
+            fleet.append(placement)
+            for index in placement.cells:
+                blocked.add(index)
+                blocked.update(self.halo_neighbours[index])
+        return fleet
+
+
+# default 10x10 board with FLEET
+GEOMETRY = Geometry()
+
+# tables of the default board
+# cell index -> coordinates and position e.g. (1, 1) = COORDS[11], 'B2' = POSITIONS[11]
+COORDS = GEOMETRY.coords
+POSITIONS = GEOMETRY.positions
+
+# coordinates or position -> cell index
+INDEX_BY_COORDS = {coords : i for i, coords in enumerate(COORDS)}
+INDEX_BY_POSITION = {position : i for i, position in enumerate(POSITIONS)}
+
+# cell index -> tuple of indexes of neighbouring cells (left, right; up, down; diagonals)
+HORIZONTAL_NEIGHBOURS = GEOMETRY.horizontal_neighbours
+VERTICAL_NEIGHBOURS = GEOMETRY.vertical_neighbours
+ORTHOGONAL_NEIGHBOURS = GEOMETRY.orthogonal_neighbours
+DIAGONAL_NEIGHBOURS = GEOMETRY.diagonal_neighbours
+HALO_NEIGHBOURS = GEOMETRY.halo_neighbours
+
+# cell index -> bit mask of the cell and its eight neighbours
+HALO_MASKS = GEOMETRY.halo_masks
+
+# bit mask with all 100 cells set
+FULL_MASK = GEOMETRY.full_mask
+
+# tables of placements of the default board, built on the first access (see __getattr__()):
+# PLACEMENTS - ship size -> list of all its placements
+# PLACEMENTS_BY_CELL - ship size -> list with indexes of placements (in PLACEMENTS[size]) covering every cell
+# PLACEMENT_BY_CELLS - tuple of ship's cell indexes -> its placement
+LAZY_TABLES = \
+{
+    'PLACEMENTS' : lambda: GEOMETRY.get_placements(),
+    'PLACEMENTS_BY_CELL' : lambda: GEOMETRY.get_placements_by_cell(),
+    'PLACEMENT_BY_CELLS' : lambda: {placement.cells : placement for placements in GEOMETRY.get_placements().values()
+                                    for placement in placements}
+}
+
+
+# every symmetry of the board (rotations and reflections) as tuple mapping cell index to
+# transformed cell index; the fleet distribution is the same for all of them
+SYMMETRIES = [tuple(INDEX_BY_COORDS[transform(x, y)] for x, y in COORDS) for transform in (
+    lambda x, y: (x, y), lambda x, y: (9 - x, y), lambda x, y: (x, 9 - y), lambda x, y: (9 - x, 9 - y),
+    lambda x, y: (y, x), lambda x, y: (9 - y, x), lambda x, y: (y, 9 - x), lambda x, y: (9 - y, 9 - x))]
+
+
+def get_random_fleet(rng = random, geometry = None):
+    """ Return list of placements for all ships of the board's fleet (FLEET on default board).
+        Every ship is chosen uniformly from placements that are still legal (not touching
+        already placed ships), so no random location has to be retried. On boards too large
+        for placement tables random placements are tried until a legal one is found, which
+        takes few tries as long as the fleet covers small part of the board.
+        Random numbers are drawn from rng (random.Random or any object with the same methods,
+        global generator of random module by default). """
+    return (GEOMETRY if geometry is None else geometry).get_random_fleet(rng)
+
+
+def new_ship_ids(geometry):
+    """ Return zeroed array for index of the ship + 1 in every cell (0 - cell is empty). """
+    if len(geometry.fleet) < 256:
+        return bytearray(geometry.area)
+    return array('I', bytes(4 * geometry.area))
+
+
+def format_grid(name, values, geometry = None):
+    """ Return board drawn as text, values are texts of all cells in cell index order. """
+    geometry = GEOMETRY if geometry is None else geometry
+    if (geometry.width, geometry.height) == (10, 10):
+        return GRID.format(name, **dict(zip(POSITIONS, values)))
+
+    cell_width = len(geometry.columns[-1])
+    row_width = len(str(geometry.height)) + 2
+    rule = '_' * (row_width + 2 + (cell_width + 1) * geometry.width)
+    lines = ['', name, rule, '',
+             ' ' * (row_width + 2) + ' '.join(column.ljust(cell_width) for column in geometry.columns),
+             ' ' * (row_width + 2) + ' '.join('_' * cell_width for _ in geometry.columns)]
+    for y in range(geometry.height):
+        row = values[y * geometry.width : (y + 1) * geometry.width]
+        lines.append('  ' + str(y + 1).ljust(row_width - 1) + '|' +
+                     '|'.join(value.ljust(cell_width) for value in row) + '|')
+    lines += [rule, '']
+    return '\n'.join(lines)
+
 
 class Board:
     """ Class representing board on which ships are placed. Game have two
         boards: one for player ships and the other for enemy's ships. """
     
-    def __init__(self, name, hidden = False):
+    def __init__(self, name, hidden = False, fleet = None, rng = None, geometry = None):
         # board name
         self.name = name
-        # main variable -> dictionary which keeps positions e.g. 'A1' and values as Cell() objects
-        self.board = {self.to_position((i, j)) : Cell() for i in range(10) for j in range(10)}
+        # generator of random numbers (see get_random_fleet())
+        self.rng = random if rng is None else rng
+        # dimensions of the board and sizes of ships, 10x10 with FLEET by default
+        self.geometry = GEOMETRY if geometry is None else geometry
+        # main variable -> state flags (CELL_SHIP, ...) of every cell indexed by cell index (see Geometry)
+        self.cells = bytearray(self.geometry.area)
+        # index of the ship (in ships list) + 1 that has unit in every cell, 0 if cell is empty
+        self.ship_ids = new_ship_ids(self.geometry)
         # list of all ships placed on board
-        self.ships = self.__generate_ships(hidden)
-        # set of coordinates saved as tuples e.g. (1, 2) which are possible to shoot
-        self.possible_moves = {(i, j) for i in range(10) for j in range(10)}
+        self.ships = []
+        self.__generate_ships(hidden, fleet)
+        # set of cell indexes which are possible to shoot
+        self.possible_moves = Cell_Set.full(self.geometry.area)
 
     def __repr__(self):
-        return str(self.board)        
-
-    def __get_ships_coords_board(self):
-        """ Generate and return two-dimensional list of Boolean values: True - is ship, False - empty. """
-        ships_coords_board = []
-        ships_coords_list = [cell.is_ship() for cell in self.board.values()]
-        for i in range(0, 100, 10):
-            ships_coords_board.append(ships_coords_list[i : i + 10])
-
-        return ships_coords_board 
-
-    def __generate_ships(self, hidden):
-        """ Used by board's constructor to generate and place all ships on board in random locations.
-        # Create:
-        # 1 ship of size 4
-        # 2 ships of size 3
-        # 3 ships of size 2
-        # 4 ships of size 1
-        # Return list of created ships. """
-
-        ships_list = []
-        # number - number of ships to generate, starts from 1, ends on 4
-        # size - size of each ship, starts from 4, ends on 1
-        # loop iterates reversely to place largest ship first
-        for number, size in enumerate(range(4, 0, -1), 1):
-            for _ in range(number):
-
-                # get 10x10 list of lists with ships' locations
-                ships_coords_board = self.__get_ships_coords_board()
-
-                # get random coordinates in range [0, 9]
-                coords = self.get_random_coords()
-
-                # get random direction
-                direction = Direction.get_random_direction()
-
-                # create temporary ship that will be placed on board
-                ship = Ship(coords, size, direction)
-                        
-                # check if ship can be placed; if not try other random coordinate
-                while not self.__ship_can_be_placed(ship, ships_coords_board):
-                    coords = self.get_random_coords()
-                    direction = Direction.get_random_direction()
-                    ship = Ship(coords, size, direction)
-                    
-                self.__place_ship(ship, hidden)
-                ships_list.append(ship)
-
-        return ships_list
-
-    def __ship_is_colliding(self, ship_coords, ships_board):
-        """ Check if there is already another ship in given coordinates or around it. """
-
-        x, y = ship_coords
-        left, right = x, x
-        top, bottom = y, y
-
-        # protect indexes from going out of board's bounds (could be done better)
-        if x != 0:
-            left = x - 1
-        if x != 9:
-            right = x + 1
-        if y != 0:
-            top = y - 1
-        if y != 9:
-            bottom = y + 1
-        
-        if ships_board[x][y] == True or \
-           ships_board[left][y] == True or \
-           ships_board[left][top] == True or \
-           ships_board[x][top] == True or \
-           ships_board[right][top] == True or \
-           ships_board[right][y] == True or \
-           ships_board[right][bottom] == True or \
-           ships_board[x][bottom] == True or \
-           ships_board[left][bottom] == True:
-            return True
-
-        return False
-
-    def __ship_can_be_placed(self, ship, ships_coords_board):
-        """ Return True if ship can be placed in this place or False otherwise. """
-
-        # check if ship would be placed out of board's bounds
-        x, y = ship.get_tail()
-        if x > 9 or y > 9:
-            return False
-
-        # check if ship would collide with another ship
-        for i in range(ship.get_size()):
-            coords = ship.get_coords(i)
-            if self.__ship_is_colliding(coords, ships_coords_board):
-                return False
+        return ''.join(CELL_VALUES[state] for state in self.cells)
 
-        return True
+    def __generate_ships(self, hidden, fleet = None):
+        """ Used by board's constructor to generate and place all ships on board in random locations
+            (see FLEET and get_random_fleet()) or in locations from given list of placements. """
+        for placement in fleet or self.geometry.get_random_fleet(self.rng):
+            ship = Ship(placement.coords, placement.size, placement.direction, self.geometry.width)
+            self.__place_ship(ship, hidden)
 
     def __place_ship(self, ship, hidden):
         " Place ship in given coordinates. "
-        for i in range(ship.get_size()):
-            coords = ship.get_coords(i)
-            pos = self.to_position(coords)
-            self.board[pos].set_ship()
-            if hidden:
-                self.board[pos].set_hidden()
+        state = CELL_SHIP | CELL_HIDDEN if hidden else CELL_SHIP
+        self.ships.append(ship)
+        for cell in ship:
+            self.cells[cell] |= state
+            self.ship_ids[cell] = len(self.ships)
     
     def are_all_ships_destroyed(self):
         """ Check if every ship on board sank. """
@@ -351,149 +770,721 @@ class Board:
     def show_all_ships(self):
         """ Shows all hidden ships. Used after player looses to show where were placed hidden ships. """
         for ship in self.ships:
-            for coords in ship:
-                position = self.to_position(coords)
-                self.board[position].show()
-    
+            for cell in ship:
+                self.cells[cell] &= ~CELL_HIDDEN
+
+    def get_fleet(self):
+        """ Return list of tuples with cell indexes of every ship (in FLEET order). """
+        return [ship.cells for ship in self.ships]
+
+    def get_cell(self, cell):
+        """ Return Cell object giving access to state of cell with given index. """
+        return Cell(self.cells, cell)
+
+    def get_ship_by_cell(self, cell):
+        """ Return ship object from ship list that has unit in cell with given index. """
+        ship_id = self.ship_ids[cell]
+        # ship in given cell doesn't exist or something went wrong
+        if not ship_id:
+            raise ValueError
+        return self.ships[ship_id - 1]
+
     def get_ship_by_coords(self, coords):
         """ Return ship object from ship list that has given coordinates. """
-        for ship in self.ships:
-            if coords in ship:
-                return ship
-        # ship with given coordinates doesn't exist or something went wrong
-        raise ValueError 
+        return self.get_ship_by_cell(self.geometry.to_index(coords))
 
     def get_random_coords(self):
         """ Return random coordinates. """
-        x, y = random.randint(0, 9), random.randint(0, 9)
+        x, y = self.rng.randrange(self.geometry.width), self.rng.randrange(self.geometry.height)
         return (x, y)
 
     def get_random_possible_position(self):
-        """ Return random position from possible moves. """
-        coords = random.choice(list(self.possible_moves))
-        return self.to_position(coords)
-
-    def get_near_possible_positions(self, position, direction, diagonally = False):
-        """ Return possible positions near given position. """
-        near_moves = []
-        x, y = self.to_coords(position)
-        
-        # return if possible left, right, up, down positions
-        if direction == Direction.NONE or direction == Direction.HORIZONTAL:
-            if (x - 1, y) in self.possible_moves:
-                near_moves.append((x - 1, y))
-            if (x + 1, y) in self.possible_moves:
-                near_moves.append((x + 1, y))
-        if direction == Direction.NONE or direction == Direction.VERTICAL:
-            if (x, y - 1) in self.possible_moves:
-                near_moves.append((x, y - 1))
-            if (x, y + 1) in self.possible_moves:
-                near_moves.append((x, y + 1))
-
-        # return if possible all positions diagonally
-        if diagonally:
-            if (x - 1, y - 1) in self.possible_moves:
-                near_moves.append((x - 1, y - 1))
-            if (x + 1, y - 1) in self.possible_moves:
-                near_moves.append((x + 1, y - 1))
-            if (x - 1, y + 1) in self.possible_moves:
-                near_moves.append((x - 1, y + 1))
-            if (x + 1, y + 1) in self.possible_moves:
-                near_moves.append((x + 1, y + 1))
-
-        # cast all elements from coordinates to positions
-        near_moves = [self.to_position(coords) for coords in near_moves]
-
-        return near_moves  
-
-    def to_position(self, coords):
-        """ Return position as string based on x, y coordinates e.g. 'A1' = to_position((0, 0)) """
-        
-        x, y = coords
-        return LETTERS[x] + str(y + 1)
+        """ Return random cell index from possible moves. """
+        return self.possible_moves.choice(self.rng)
+
+    def is_possible_position(self, cell):
+        """ Check if cell with given index can be shot. """
+        return cell in self.possible_moves
+
+    def get_near_possible_positions(self, cell, direction, diagonally = False):
+        """ Return indexes of possible cells near cell with given index. """
+        if METRICS is not None:
+            METRICS.neighbour_queries += 1
+
+        # left, right, up, down cells
+        geometry = self.geometry
+        if direction == Direction.NONE:
+            near = geometry.orthogonal_neighbours[cell]
+        elif direction == Direction.HORIZONTAL:
+            near = geometry.horizontal_neighbours[cell]
+        else:
+            near = geometry.vertical_neighbours[cell]
 
-    def to_coords(self, position):
-        """ Return coordinates from position e.g. (0, 0) = to_coords('A1') """
-        
-        coords = []
-        coords.append(LETTERS.index(position[0]))
-        coords.append(int(position[1:]) - 1)
-        
-        return tuple(coords) 
+        # all cells diagonally
+        if diagonally:
+            near += geometry.diagonal_neighbours[cell]
+
+        possible = self.possible_moves.positions
+        return [i for i in near if possible[i]]
+
+    def to_position(self, cell):
+        """ Return position as string based on cell index e.g. 'A1' = to_position(0) """
+        return self.geometry.positions[cell]
+
+    def to_coords(self, cell):
+        """ Return coordinates from cell index e.g. (0, 1) = to_coords(10) """
+        return self.geometry.coords[cell]
+
+    def shoot(self, cell):
+        """ Shoot at cell with given index. Return report describing what has happened. """
+        if METRICS is None:
+            return self.__shoot(cell)
+        start = time.perf_counter()
+        report = self.__shoot(cell)
+        METRICS.add_shot(report, time.perf_counter() - start)
+        return report
 
-    def shoot(self, position):
-        """ Shoot at position in board. Return report describing what has happened. """
-        coords = self.to_coords(position)
+    def __shoot(self, cell):
 
         # check if shooting is possible
         # continue if it is, or return if it's not
-        if coords in self.possible_moves:
-            self.possible_moves.remove(coords)
+        possible_moves = self.possible_moves
+        positions = possible_moves.positions
+        if 0 <= cell < len(positions) and positions[cell]:
+            possible_moves.remove(cell)
         else:
             return Report.NOT_VALID
 
+        cells = self.cells
         # cell is empty
-        if self.board[position].is_empty():
-            self.board[position].set_missed()
+        if not cells[cell] & (CELL_SHIP | CELL_DESTROYED):
+            cells[cell] = cells[cell] & ~CELL_HIDDEN | CELL_MISSED
             return Report.MISSED
         # there is ship
-        elif self.board[position].is_ship():
+        elif cells[cell] & CELL_SHIP:
             # set board's cell to value -> destroyed
-            self.board[position].set_destroyed()
-            # get board's ship which position was hit
-            ship = self.get_ship_by_coords(coords)
+            cells[cell] = cells[cell] & ~(CELL_HIDDEN | CELL_SHIP) | CELL_DESTROYED
+            # get board's ship which cell was hit
+            ship = self.ships[self.ship_ids[cell] - 1]
             # change ship state
             ship.hit()
             if ship.is_destroyed():
                 # ship sank
                 # block cells around destroyed ship
-                for coords in ship:
-                    pos = self.to_position(coords)
-                    positions_list = self.get_near_possible_positions(pos, Direction.NONE, True)
-                    for pos in positions_list:
-                        coords = self.to_coords(pos)
-                        self.possible_moves.remove(coords)
-                        self.board[pos].set_missed()
+                halo_neighbours = self.geometry.halo_neighbours
+                for unit in ship:
+                    for index in halo_neighbours[unit]:
+                        if positions[index]:
+                            possible_moves.remove(index)
+                            cells[index] = cells[index] & ~CELL_HIDDEN | CELL_MISSED
                 return Report.DESTROYED
             else:
                 # ship is still floating
                 return Report.HIT
 
+    def format(self, name = None, show_hidden = False):
+        """ Return board drawn as text. Board's name can be replaced (e.g. to show board
+            in other language) and hidden ships can be shown (e.g. to board's owner). """
+        mask = ~CELL_HIDDEN if show_hidden else 0xff
+        values = [CELL_VALUES[state & mask] for state in self.cells]
+        return format_grid(self.name if name is None else name, values, self.geometry)
+
+    def print(self):
+        """ Show board to user. """
+        print(self.format())
+
+
+class Bit_Board:
+    """ Compact alternative to Board. Ships, hits, misses and possible moves are kept
+        as integer masks (bit y * width + x is cell with coordinates (x, y)), so shooting
+        is done with few bit operations. Has the same interface as Board, so it can be
+        used by Player_AI. Works only on boards small enough for bit masks (see Geometry). """
+
+    def __init__(self, name, hidden = False, fleet = None, rng = None, geometry = None):
+        self.name = name
+        self.hidden = hidden
+        self.rng = random if rng is None else rng
+        self.geometry = GEOMETRY if geometry is None else geometry
+        if self.geometry.full_mask is None:
+            raise ValueError('Board is too large for Bit_Board')
+        # mask of every ship's body and mask of body with cells around it
+        self.ship_masks = []
+        self.halo_masks = []
+        # index of the ship in ship_masks + 1 for every cell, 0 if cell is empty
+        self.owners = new_ship_ids(self.geometry)
+        self.ships = 0
+        self.hits = 0
+        self.misses = 0
+        self.possible = self.geometry.full_mask
+        self.__generate_ships(fleet)
+
+    def __repr__(self):
+        return 'Bit_Board(ships={:#x}, hits={:#x}, misses={:#x})'.format(self.ships, self.hits, self.misses)
+
+    def __generate_ships(self, fleet = None):
+        """ Place ships in random locations or in locations from given list of placements.
+            Same fleet as in Board. """
+        for placement in fleet or self.geometry.get_random_fleet(self.rng):
+            self.ship_masks.append(placement.body)
+            for index in placement.cells:
+                self.owners[index] = len(self.ship_masks)
+            self.halo_masks.append(placement.halo)
+            self.ships |= placement.body
+
+    to_position = Board.to_position
+    to_coords = Board.to_coords
+
+    def are_all_ships_destroyed(self):
+        return self.ships & ~self.hits == 0
+
+    def show_all_ships(self):
+        self.hidden = False
+
+    def get_ship_by_cell(self, cell):
+        """ Return Ship object rebuilt from the mask of ship that has unit in given cell. """
+        owner = self.owners[cell]
+        if not owner:
+            raise ValueError
+        mask = self.ship_masks[owner - 1]
+        head = (mask & -mask).bit_length() - 1
+        size = bin(mask).count('1')
+        if size > 1 and mask >> head & 2:
+            direction = Direction.HORIZONTAL
+        else:
+            direction = Direction.VERTICAL
+        return Ship(self.geometry.coords[head], size, direction, self.geometry.width)
+
+    get_ship_by_coords = Board.get_ship_by_coords
+
+    def get_fleet(self):
+        """ Return list of tuples with cell indexes of every ship (in FLEET order). """
+        return [tuple(i for i in range(self.geometry.area) if mask >> i & 1) for mask in self.ship_masks]
+
+    def get_random_possible_position(self):
+        """ Return random cell index from possible moves. """
+        possible = self.possible
+        # clear random number of lowest bits, the lowest remaining bit is chosen cell
+        for _ in range(self.rng.randrange(bin(possible).count('1'))):
+            possible &= possible - 1
+        return (possible & -possible).bit_length() - 1
+
+    def is_possible_position(self, cell):
+        return self.possible >> cell & 1 == 1
+
+    def get_near_possible_positions(self, cell, direction, diagonally = False):
+        """ Return indexes of possible cells near cell with given index. """
+        if METRICS is not None:
+            METRICS.neighbour_queries += 1
+        geometry = self.geometry
+        if direction == Direction.NONE:
+            near = geometry.orthogonal_neighbours[cell]
+        elif direction == Direction.HORIZONTAL:
+            near = geometry.horizontal_neighbours[cell]
+        else:
+            near = geometry.vertical_neighbours[cell]
+        if diagonally:
+            near += geometry.diagonal_neighbours[cell]
+
+        return [i for i in near if self.possible >> i & 1]
+
+    def shoot(self, cell):
+        """ Shoot at cell with given index. Return report describing what has happened. """
+        if METRICS is None:
+            return self.__shoot(cell)
+        start = time.perf_counter()
+        report = self.__shoot(cell)
+        METRICS.add_shot(report, time.perf_counter() - start)
+        return report
+
+    def __shoot(self, cell):
+        bit = 1 << cell
+        if not self.possible & bit:
+            return Report.NOT_VALID
+        self.possible ^= bit
+
+        if not self.ships & bit:
+            self.misses |= bit
+            return Report.MISSED
+
+        self.hits |= bit
+        owner = self.owners[cell] - 1
+        if self.ship_masks[owner] & ~self.hits:
+            return Report.HIT
+
+        # ship sank, block cells around it
+        blocked = self.halo_masks[owner] & self.possible
+        self.possible ^= blocked
+        self.misses |= blocked
+        return Report.DESTROYED
+
+    def format(self):
+        """ Return board drawn as text. """
+        values = []
+        for index in range(self.geometry.area):
+            bit = 1 << index
+            if self.misses & bit:
+                value = '.'
+            elif self.hits & bit:
+                value = 'X'
+            elif self.ships & bit and not self.hidden:
+                value = 'O'
+            else:
+                value = '_'
+            values.append(value)
+        return format_grid(self.name, values, self.geometry)
+
     def print(self):
         """ Show board to user. """
-        print(GRID.format(self.name, **self.board))
+        print(self.format())
+
+
+class Density:
+    """ Probability density of remaining ships used by Player_AI with Strategy.DENSITY.
+        For every ship size it keeps number of still possible placements covering each cell.
+        Placements are only removed when cell becomes unavailable, so each shot updates
+        just placements going through that cell instead of counting everything again. """
+
+    TARGETING = False
+
+    def __init__(self, rng = None, geometry = None):
+        self.rng = random if rng is None else rng
+        geometry = GEOMETRY if geometry is None else geometry
+        self.halo_neighbours = geometry.halo_neighbours
+        self.placements = geometry.get_placements()
+        self.placements_by_cell = geometry.get_placements_by_cell()
+        # ship size -> number of not yet destroyed ships of that size
+        self.remaining = {size : geometry.fleet.count(size) for size in self.placements}
+        # ship size -> 1 for every placement that is still possible, 0 otherwise
+        self.alive = {size : bytearray(b'\x01' * len(placements)) for size, placements in self.placements.items()}
+        # ship size -> number of possible placements covering every cell
+        self.cover = {size : [len(by_cell) for by_cell in self.placements_by_cell[size]] for size in self.placements}
+        # cells that were not shot or blocked yet
+        self.open = set(range(geometry.area))
+
+    def remove(self, index):
+        """ Mark cell as unavailable (shot or blocked) and drop placements going through it. """
+        if index not in self.open:
+            return
+        self.open.remove(index)
+        for size, alive in self.alive.items():
+            cover = self.cover[size]
+            placements = self.placements[size]
+            for i in self.placements_by_cell[size][index]:
+                if alive[i]:
+                    alive[i] = 0
+                    for cell in placements[i].cells:
+                        cover[cell] -= 1
+
+    def sink(self, cells):
+        """ Update density after ship with given cells was destroyed. """
+        self.remaining[len(cells)] -= 1
+        for index in cells:
+            for near in self.halo_neighbours[index]:
+                self.remove(near)
+
+    def get_best_cells(self):
+        """ Return list of open cells with the highest density. """
+        weights = [(count, self.cover[size]) for size, count in self.remaining.items() if count]
+        best_cells = []
+        best = -1
+        for index in self.open:
+            density = 0
+            for count, cover in weights:
+                density += count * cover[index]
+            if density > best:
+                best = density
+                best_cells = [index]
+            elif density == best:
+                best_cells.append(index)
+        return best_cells
+
+    def get_shoot_position(self, board):
+        """ Return one of the cells most likely covered by ship. """
+        return self.rng.choice(self.get_best_cells())
+
+    def update(self, cell, report, ship_hits):
+        self.remove(cell)
+        if report == Report.DESTROYED:
+            self.sink(ship_hits)
+
+
+class Fleet_Sampler:
+    """ Pool of random fleets of remaining ships consistent with results of previous shots,
+        used by Player_AI with Strategy.MONTE_CARLO. Pool is kept between turns: new shot
+        only discards fleets it contradicts and missing fleets are sampled lazily. """
+
+    # number of fleets kept in the pool
+    POOL_SIZE = 100
+    # maximum number of fleets sampled in one turn, unless pool is empty
+    TOP_UP = 20
+    # number of random placements tried before looking through all legal placements
+    TRIES = 10
+
+    TARGETING = True
+
+    def __init__(self, rng = None, geometry = None):
+        self.rng = random if rng is None else rng
+        geometry = GEOMETRY if geometry is None else geometry
+        if geometry.halo_masks is None:
+            raise ValueError('Board is too large for Strategy.MONTE_CARLO')
+        self.area = geometry.area
+        self.halo_masks = geometry.halo_masks
+        self.placements = geometry.get_placements()
+        # sizes of not yet destroyed ships, largest first
+        self.remaining = list(geometry.fleet)
+        # mask of cells where no ship can be: missed, sunk ships and cells around them
+        self.blocked = 0
+        # mask of hit cells of not yet destroyed ship
+        self.hits = 0
+        # list of [mask of all ships' units, list of placements] pairs
+        self.samples = []
+        # number of fleets in pool occupying every cell
+        self.counts = [0] * self.area
+
+    def __add(self, sample):
+        self.samples.append(sample)
+        for placement in sample[1]:
+            for index in placement.cells:
+                self.counts[index] += 1
+
+    def __discard(self, sample):
+        for placement in sample[1]:
+            for index in placement.cells:
+                self.counts[index] -= 1
+
+    def __filter(self, keep):
+        """ Discard fleets for which keep(sample) is False. """
+        samples = self.samples
+        self.samples = []
+        for sample in samples:
+            if keep(sample):
+                self.samples.append(sample)
+            else:
+                self.__discard(sample)
+
+    def __choose_placement(self, placements, blocked):
+        """ Return random placement not colliding with blocked mask or None. """
+        for _ in range(self.TRIES):
+            placement = self.rng.choice(placements)
+            if not placement.body & blocked:
+                return placement
+        legal = [placement for placement in placements if not placement.body & blocked]
+        return self.rng.choice(legal) if legal else None
+
+    def get_covering_placements(self):
+        """ Return list of placements of remaining ships that cover all hits and list of
+            their weights (number of remaining ships of placement's size). Ship is not sunk
+            yet, so it has more units than hits. """
+        hits = bin(self.hits).count('1')
+        covering = [placement for size in set(self.remaining) if size > hits for placement in self.placements[size]
+                    if placement.body & self.hits == self.hits and not placement.body & self.blocked]
+        return covering, [self.remaining.count(placement.size) for placement in covering]
+
+    def sample(self, covering = None, weights = None):
+        """ Return random fleet of remaining ships consistent with observations or None.
+            If there are hits, placements covering them (see get_covering_placements())
+            have to be given. """
+        blocked = self.blocked
+        sizes = list(self.remaining)
+        placements = []
+        if self.hits:
+            # hits belong to one ship, place it first over all of them
+            if not covering:
+                return None
+            placement = self.rng.choices(covering, weights)[0]
+            sizes.remove(placement.size)
+            placements.append(placement)
+            blocked |= placement.halo
+        else:
+            # no other ship can be placed on hit cells
+            blocked |= self.hits
+
+        for size in sizes:
+            placement = self.__choose_placement(self.placements[size], blocked)
+            if placement is None:
+                return None
+            placements.append(placement)
+            blocked |= placement.halo
+
+        mask = 0
+        for placement in placements:
+            mask |= placement.body
+        return [mask, placements]
+
+    def top_up(self):
+        """ Sample new fleets until pool is full or limit of tries for this turn is reached. """
+        tries = self.TOP_UP if self.samples else self.POOL_SIZE
+        if len(self.samples) >= self.POOL_SIZE:
+            return
+        covering, weights = self.get_covering_placements() if self.hits else (None, None)
+        while len(self.samples) < self.POOL_SIZE and tries:
+            tries -= 1
+            sample = self.sample(covering, weights)
+            if sample is not None:
+                self.__add(sample)
+
+    def miss(self, index):
+        bit = 1 << index
+        self.blocked |= bit
+        self.__filter(lambda sample: not sample[0] & bit)
+
+    def hit(self, index):
+        self.hits |= 1 << index
+        hits = self.hits
+        count = bin(hits).count('1')
+        # keep fleets with ship covering all hits, which is longer than number of hits (it's not sunk)
+        self.__filter(lambda sample: any(placement.body & hits == hits and placement.size > count
+                                         for placement in sample[1]))
+
+    def sink(self, cells):
+        """ Update pool after ship with given cells was destroyed. """
+        body = 0
+        halo = 0
+        for index in cells:
+            body |= 1 << index
+            halo |= self.halo_masks[index]
+        self.remaining.remove(len(cells))
+        self.blocked |= halo
+        self.hits &= ~body
+
+        # keep fleets with ship in exactly this place and remove the ship from them
+        samples = self.samples
+        self.samples = []
+        for sample in samples:
+            self.__discard(sample)
+            placements = [placement for placement in sample[1] if placement.body != body]
+            if len(placements) < len(sample[1]):
+                self.__add([sample[0] & ~body, placements])
+
+    def get_best_cells(self):
+        """ Return list of not yet shot cells occupied by the largest number of fleets
+            from the pool. Empty list if no fleet in the pool occupies such cell. """
+        self.top_up()
+        if not self.samples:
+            return []
+        counts = self.counts
+        if self.hits:
+            # finish hit ship first, count only placements of the ship covering hits
+            counts = [0] * self.area
+            for _, placements in self.samples:
+                for placement in placements:
+                    if placement.body & self.hits == self.hits:
+                        for index in placement.cells:
+                            counts[index] += 1
+                        break
+
+        known = self.blocked | self.hits
+        best_cells = []
+        best = 0
+        for index, count in enumerate(counts):
+            if not count or count < best or known >> index & 1:
+                continue
+            if count > best:
+                best = count
+                best_cells = [index]
+            else:
+                best_cells.append(index)
+        return best_cells
+
+    def get_shoot_position(self, board):
+        """ Return one of the cells most often occupied by sampled fleets, None if pool is empty. """
+        best_cells = self.get_best_cells()
+        return self.rng.choice(best_cells) if best_cells else None
+
+    def update(self, cell, report, ship_hits):
+        if report == Report.MISSED:
+            self.miss(cell)
+        else:
+            self.hit(cell)
+        if report == Report.DESTROYED:
+            self.sink(ship_hits)
+
+
+class Random_Hunt:
+    """ Strategy used by Player_AI with Strategy.RANDOM: random position from possible moves. """
+
+    TARGETING = False
+
+    def __init__(self, rng = None, geometry = None):
+        self.rng = random if rng is None else rng
+
+    def get_shoot_position(self, board):
+        return board.get_random_possible_position()
+
+    def update(self, cell, report, ship_hits):
+        pass
+
+
+class Parity_Hunt(Random_Hunt):
+    """ Strategy used by Player_AI with Strategy.PARITY. Shoots random cells (x, y) with
+        (x + y) % step == offset, where step is size of the smallest remaining ship larger
+        than 1, so every such ship covers at least one of them. Ships of size 1 are found
+        by random hunting after all these cells were shot. """
+
+    def __init__(self, rng = None, geometry = None):
+        super().__init__(rng, geometry)
+        self.geometry = GEOMETRY if geometry is None else geometry
+        # sizes of not yet destroyed ships
+        self.remaining = list(self.geometry.fleet)
+        # lattice is built again when step changes
+        self.step = None
+        self.lattice = Cell_Set(0)
+
+    def get_shoot_position(self, board):
+        step = min((size for size in self.remaining if size > 1), default = 0)
+        if step != self.step:
+            self.step = step
+            if step:
+                offset = self.rng.randrange(step)
+                width = self.geometry.width
+                self.lattice = Cell_Set(self.geometry.area, (i for i in range(self.geometry.area)
+                                        if (i % width + i // width) % step == offset and board.is_possible_position(i)))
+            else:
+                # only ships of size 1 are left
+                self.lattice = Cell_Set(0)
+        # cells around sunk ships are blocked without being shot, skip them
+        while self.lattice:
+            cell = self.lattice.choice(self.rng)
+            if board.is_possible_position(cell):
+                return cell
+            self.lattice.remove(cell)
+        return board.get_random_possible_position()
+
+    def update(self, cell, report, ship_hits):
+        if report == Report.DESTROYED:
+            self.remaining.remove(len(ship_hits))
+
+
+# Strategies of Player_AI: name -> class. Strategy is created with (rng, geometry) and has:
+#   TARGETING - if True, strategy chooses positions also while hit ship is not destroyed
+#   get_shoot_position(board) - cell index to shoot or None (AI finishes hit ship or shoots randomly)
+#   update(cell, report, ship_hits) - called after every valid shot of the AI, ship_hits are cell
+#                                     indexes of hit units of not yet destroyed (or just sunk) ship
+STRATEGIES = \
+{
+    Strategy.RANDOM.name : Random_Hunt,
+    Strategy.DENSITY.name : Density,
+    Strategy.MONTE_CARLO.name : Fleet_Sampler,
+    Strategy.PARITY.name : Parity_Hunt
+}
+
+
+def register_strategy(name, strategy_class):
+    """ Add strategy class (see STRATEGIES) under given name, so it can be used by Player_AI. """
+    STRATEGIES[name] = strategy_class
+
+
+def get_strategy_name(strategy):
+    """ Return name of Strategy or of registered strategy. """
+    return strategy.name if isinstance(strategy, Strategy) else strategy
+
+
+# Opening book file: OPENING_MAGIC, number of cells (1 byte) and cell indexes (1 byte each)
+# in order in which they should be shot at the beginning of the game (see opening_book.py)
+OPENING_MAGIC = b'BSO1'
+
+OPENING_BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'opening_book.bin')
+
+# opening book loaded by get_opening_book(), None until the first call
+OPENING_BOOK = None
+
+
+def load_opening_book(path = OPENING_BOOK_PATH):
+    """ Return tuple of cell indexes read from opening book file. Raise ValueError if file is not valid. """
+    with open(path, 'rb') as file:
+        data = file.read()
+    if data[:len(OPENING_MAGIC)] != OPENING_MAGIC:
+        raise ValueError('Not a battleship opening book')
+    length = data[len(OPENING_MAGIC)]
+    cells = tuple(data[len(OPENING_MAGIC) + 1 : len(OPENING_MAGIC) + 1 + length])
+    if len(cells) != length or any(cell >= 100 for cell in cells):
+        raise ValueError('Invalid battleship opening book')
+    return cells
+
+
+def get_opening_book():
+    """ Return opening book from OPENING_BOOK_PATH, file is read only once.
+        Empty tuple if there is no opening book. """
+    global OPENING_BOOK
+    if OPENING_BOOK is None:
+        try:
+            OPENING_BOOK = load_opening_book()
+        except (OSError, ValueError):
+            OPENING_BOOK = ()
+    return OPENING_BOOK
 
 
 class Player_AI:
 
-    def __init__(self):
-        # possible positions that can be shot by ai if ship was hit
-        self.possible_moves = set()
-        # position that will be shot next
+    def __init__(self, strategy = Strategy.RANDOM, rng = None, opening_book = None, geometry = None):
+        # Strategy or name of registered strategy (see STRATEGIES)
+        self.strategy = strategy
+        # generator of random numbers used to break ties between equally good cells
+        self.rng = random if rng is None else rng
+        # geometry of boards the AI will shoot at (see Board)
+        geometry = GEOMETRY if geometry is None else geometry
+        # cell indexes shot in given order while no ship is hit (see get_opening_book()), they are
+        # rotated or reflected randomly, so the opening is not always the same; the opening
+        # book is made for the default board only
+        self.opening = ()
+        if opening_book and geometry == GEOMETRY:
+            symmetry = self.rng.choice(SYMMETRIES)
+            self.opening = [symmetry[cell] for cell in reversed(opening_book)]
+        # strategy choosing positions, while hit ship is not destroyed only if it's TARGETING
+        self.hunter = STRATEGIES[get_strategy_name(strategy)](self.rng, geometry)
+        # possible cell indexes that can be shot by ai if ship was hit
+        self.possible_moves = Indexed_Set()
+        # cell index that will be shot next
         self.shoot_pos = None
-        # ship's position that was hit as first
+        # ship's cell index that was hit as first
         self.first_hit_pos = None
         # if True, ship is not completely destroyed
         self.hit_not_sank = False
         # direction of just hit ship
         self.ship_direction = Direction.NONE
+        # cell indexes of all hit units of not yet destroyed ship
+        self.ship_hits = []
 
     def get_shoot_position(self, board):
-        """ Get position that AI will shoot next. """
+        """ Get cell index that AI will shoot next. """
+        if METRICS is None:
+            return self.__get_shoot_position(board)
+        start = time.perf_counter()
+        pos = self.__get_shoot_position(board)
+        METRICS.add_ai_turn(time.perf_counter() - start)
+        return pos
+
+    def __get_shoot_position(self, board):
 
         pos = None
-        # there is ship that was hit but is not yet destroyed
-        if self.hit_not_sank:
-            # try to sink the ship that was hit
-            if len(self.possible_moves) == 0:
+        # follow opening book, skip cells that can't be shot anymore
+        if not self.hit_not_sank:
+            while self.opening:
+                cell = self.opening.pop()
+                if board.is_possible_position(cell):
+                    self.shoot_pos = cell
+                    return cell
+
+        # position chosen by strategy, targeting strategies choose it also when ship is hit
+        if self.hunter.TARGETING or not self.hit_not_sank:
+            pos = self.hunter.get_shoot_position(board)
+
+        if pos is None:
+            # there is ship that was hit but is not yet destroyed, try to sink it
+            if self.hit_not_sank and len(self.possible_moves) == 0:
                 # get new possible positions based on first hit position
                 self.possible_moves = \
-                set(board.get_near_possible_positions(self.first_hit_pos, self.ship_direction))
-
-            pos = random.choice(list(self.possible_moves))             
-        else:
-            # get random position from board
-            pos = board.get_random_possible_position()
+                Indexed_Set(board.get_near_possible_positions(self.first_hit_pos, self.ship_direction))
+                # hits of targeting strategy don't have to be next to each other, try cells around all of them
+                if len(self.possible_moves) == 0:
+                    self.possible_moves = Indexed_Set(cell for hit in self.ship_hits
+                                                      for cell in board.get_near_possible_positions(hit, Direction.NONE))
+
+            if self.hit_not_sank and len(self.possible_moves) > 0:
+                pos = self.possible_moves.choice(self.rng)
+            else:
+                # get random position from board
+                pos = board.get_random_possible_position()
 
         self.shoot_pos = pos
         return pos
@@ -503,7 +1494,16 @@ class Player_AI:
             new positions to shoot. """
         # use board's method to shoot
         report = board.shoot(self.shoot_pos)
-        
+        if report == Report.NOT_VALID:
+            return report
+
+        if report != Report.MISSED:
+            self.ship_hits.append(self.shoot_pos)
+        sunk, others = self.ship_hits, []
+        if report == Report.DESTROYED:
+            sunk, others = self.__split_hits(board)
+        self.hunter.update(self.shoot_pos, report, sunk)
+
         # target was hit but not destroyed, AI will try to sink the ship next
         if report == Report.HIT:
             self.hit_not_sank = True
@@ -517,166 +1517,295 @@ class Player_AI:
                 self.ship_direction = Direction.what_direction(first_coords, second_coords)
             # get all possible positions that ship can have, it may be 0
             self.possible_moves = \
-            set(board.get_near_possible_positions(self.shoot_pos, self.ship_direction))
+            Indexed_Set(board.get_near_possible_positions(self.shoot_pos, self.ship_direction))
         # target was destroyed, clear all variables
         elif report == Report.DESTROYED:
             self.possible_moves.clear()
+            self.ship_hits = []
             self.first_hit_pos = None
             self.hit_not_sank = False
             self.ship_direction = Direction.NONE
+            # continue finishing the other ship
+            if others:
+                self.ship_hits = others
+                self.first_hit_pos = others[0]
+                self.hit_not_sank = True
+                if len(others) > 1:
+                    self.ship_direction = Direction.what_direction(board.to_coords(others[0]),
+                                                                   board.to_coords(others[1]))
+                self.possible_moves = Indexed_Set(
+                    board.get_near_possible_positions(others[0], self.ship_direction) +
+                    board.get_near_possible_positions(others[-1], self.ship_direction))
         # it's a miss -> remove this position from AI's possible moves
         elif report == Report.MISSED:
             if self.hit_not_sank:
-                self.possible_moves.remove(self.shoot_pos)
+                self.possible_moves.discard(self.shoot_pos)
 
         return report
 
-        
-def get_player_input():
-    """ Function gets user position from standard input. """
-    position = ''
-    while len(position) < 2 or \
-          position[0].upper() not in LETTERS or \
-          not position[1:].isdigit() or \
-          int(position[1:]) not in range(1, 11):
-        print(TEXTS['your turn', LANGUAGE])
-        position = input()
-
-    return position.upper()
-
-
-def print_report(report):
-    """ Print what has happened after shoot. """
-    if report == Report.MISSED:
-        print(TEXTS['missed', LANGUAGE])
-    elif report == Report.HIT:
-        print(TEXTS['hit', LANGUAGE])
-    elif report == Report.DESTROYED:
-        print(TEXTS['destroyed', LANGUAGE])
-
-
-def suspension():
-    """ Print loading animation. """
-    dot_time = SUSP_TIME / 4
-    
-    time.sleep(dot_time)
-    print('.',end='')
-    time.sleep(dot_time)
-    print('.',end='')
-    time.sleep(dot_time)
-    print('.',end='')
-    time.sleep(dot_time)
-    print()
-
-
-def player_turn(board):
-    """ Player types position and shoot. """
-
-    # Repeat if report is NOT_VALID
-    report = Report.NOT_VALID
-    while report == Report.NOT_VALID:
-        pos = get_player_input()
-        report = board.shoot(pos)
-        
-    suspension()
-    print_report(report)
-    time.sleep(TURN_TIME)
-
-            
-def ai_turn(board, ai, name = TEXTS['enemy turn', LANGUAGE]):
-    """ Turn made by AI. Similar to player_turn() function. """
-    print(name)
-    pos = ai.get_shoot_position(board)
-    suspension()
-    print(pos)
-    time.sleep(TURN_TIME)
-    report = ai.shoot(board)
-    print_report(report)
-    time.sleep(TURN_TIME)
-
-
-def print_boards(board1, board2):
-    """ Print two boards using boards' print function. """
-    board1.print()
-    board2.print()
+    def __split_hits(self, board):
+        """ Return hits of the ship sunk by the last shot (hits connected with it) and other hits.
+            Targeting strategy can hit another ship while finishing one, so they may differ. """
+        hits = set(self.ship_hits)
+        hits.remove(self.shoot_pos)
+        sunk = [self.shoot_pos]
+        for cell in sunk:
+            for near in board.geometry.orthogonal_neighbours[cell]:
+                if near in hits:
+                    hits.remove(near)
+                    sunk.append(near)
+        if not hits:
+            return self.ship_hits, []
+        return sunk, [cell for cell in self.ship_hits if cell in hits]
 
-    
-def game_over(player_win):
-    """ Print game over. Player can choose to play again. """
-    
-    if player_win:
-        print(TEXTS['win', LANGUAGE] + ' ', end='')
-    else:
-        print(TEXTS['loose', LANGUAGE] + ' ', end='')
         
-    print(TEXTS['play again', LANGUAGE] + ': ')
-    yes_letter = 'Y' if LANGUAGE == 'en' else 'T'
-    if input().upper().startswith(yes_letter):
-        return
-    else:
-        print(TEXTS['thanks', LANGUAGE])
-        sys.exit()
+class AI_Batch:
+    """ Many AI vs board games stepped in lockstep: every call chooses (or shoots) next position
+        in all unfinished games. Bound methods of every game are looked up once and finished
+        games are dropped from the list of active games, so stepping thousands of games costs
+        little more than the AIs' own work. """
+
+    def __init__(self, games):
+        # list of (Player_AI, board) pairs, AI shoots at its board
+        self.games = list(games)
+        # next position for every game, None if game is finished or position wasn't chosen yet
+        self.positions = [None] * len(self.games)
+        # number of valid shots in every game
+        self.shots = [0] * len(self.games)
+        # positions were chosen by get_shoot_positions() and not shot yet
+        self.chosen = False
+        # indexes of unfinished games with their AI's methods and board
+        self.active = [(i, ai.get_shoot_position, ai.shoot, board)
+                       for i, (ai, board) in enumerate(self.games) if not board.are_all_ships_destroyed()]
 
+    @classmethod
+    def new(cls, n_games, seed = None, board_class = Board, strategy = Strategy.RANDOM, opening_book = None,
+            geometry = None):
+        """ Create n_games games with new boards. Every game has own random.Random generator seeded
+            with a value drawn from generator initialized with given seed, so games don't depend
+            on the number of games in the batch. """
+        seeds = random.Random(seed)
+        games = []
+        for _ in range(n_games):
+            rng = random.Random(seeds.getrandbits(64))
+            games.append((Player_AI(strategy, rng, opening_book, geometry),
+                          board_class('', hidden = True, rng = rng, geometry = geometry)))
+        return cls(games)
+
+    def is_finished(self):
+        return not self.active
+
+    def get_shoot_positions(self):
+        """ Choose next position in every unfinished game. Return list of cell indexes (None for
+            finished games). """
+        positions = self.positions
+        for i, get_shoot_position, _, board in self.active:
+            positions[i] = get_shoot_position(board)
+        self.chosen = True
+        return positions
+
+    def shoot(self):
+        """ Shoot at positions chosen by get_shoot_positions(). Return list of Reports (None for
+            finished games). Games in which all ships were destroyed become finished. Raise
+            RuntimeError if positions weren't chosen since the last shot. """
+        if not self.chosen:
+            raise RuntimeError('AI_Batch.get_shoot_positions() has to be called before shoot()')
+        self.chosen = False
+        reports = [None] * len(self.games)
+        shots = self.shots
+        active = []
+        for game in self.active:
+            i, _, shoot, board = game
+            report = shoot(board)
+            reports[i] = report
+            if report != Report.NOT_VALID:
+                shots[i] += 1
+            if report != Report.DESTROYED or not board.are_all_ships_destroyed():
+                active.append(game)
+            else:
+                self.positions[i] = None
+        self.active = active
+        return reports
+
+    def step(self):
+        """ Choose position and shoot once in every unfinished game (in one pass over games).
+            Return list of Reports (None for finished games). """
+        self.chosen = False
+        reports = [None] * len(self.games)
+        positions = self.positions
+        shots = self.shots
+        active = []
+        for game in self.active:
+            i, get_shoot_position, shoot, board = game
+            positions[i] = get_shoot_position(board)
+            report = shoot(board)
+            reports[i] = report
+            if report != Report.NOT_VALID:
+                shots[i] += 1
+            if report != Report.DESTROYED or not board.are_all_ships_destroyed():
+                active.append(game)
+            else:
+                positions[i] = None
+        self.active = active
+        return reports
 
-def enemy_first():
-    """ Decide if enemy's turn should be first. """
-    return random.randint(0, 1)
-
-
-# this loop allows to initialize new game if player wants to play again
-while True:
-
-    # new game initialization
-    player_board = Board(TEXTS['your ships', LANGUAGE], hidden = False)
-    enemy_board = Board(TEXTS['enemy ships', LANGUAGE], hidden = True)
+    def run(self):
+        """ Step until all games are finished. Return number of valid shots of every game. """
+        while self.active:
+            self.step()
+        return self.shots
 
-    # player is replaced by AI
-    if PLAYER_AI:
-        player_ai = Player_AI()
-        
-    enemy_ai = Player_AI()
 
-    # print boards
-    print_boards(player_board, enemy_board)
+def enemy_first(rng = random):
+    """ Decide if enemy's turn should be first. """
+    return rng.randint(0, 1)
+
+
+class Game_Stats:
+    """ Statistics of single headless AI vs AI game. Index 0 refers to player's AI,
+        index 1 to enemy's AI (the same sides as in interactive game). """
+
+    def __init__(self, seed, first):
+        # seed of random.Random generator used by the game (see play_game())
+        self.seed = seed
+        # index of AI that made the first shot
+        self.first = first
+        # index of AI that destroyed all enemy ships
+        self.winner = None
+        # number of shots made by each AI
+        self.shots = [0, 0]
+        # number of hits (including destroying hits) made by each AI
+        self.hits = [0, 0]
+        # sizes of ships in order in which they were destroyed by each AI
+        self.sink_order = ([], [])
+        # filled only if game was recorded: cell indexes of ships on both boards
+        # and list of (cell index, report) pairs for all shots in order
+        self.fleets = None
+        self.shot_log = None
 
+    def __repr__(self):
+        return 'Game_Stats(seed={}, winner={}, shots={}, hits={})'.format(
+            self.seed, self.winner, self.shots, self.hits)
+
+    def shots_to_win(self):
+        """ Return number of shots winner needed to destroy all ships. """
+        return self.shots[self.winner]
+
+
+def play_game(seed = None, board_class = Board, strategies = (Strategy.RANDOM, Strategy.RANDOM), record = False,
+              opening_book = None, geometry = None):
+    """ Play single AI vs AI game without printing and waiting. Boards are created
+        using given board_class (Board or Bit_Board), strategies are used by player's
+        and enemy's AI. If record is True, fleets and all shots are saved in stats.
+        If opening_book (tuple of cell indexes, see get_opening_book()) is given, both AIs use it.
+        Boards have given geometry (10x10 with FLEET by default).
+        Game uses its own random.Random generator, so global random state is not touched.
+        Return Game_Stats. """
+    # random seed is saved, so every game can be repeated
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(64)
+    rng = random.Random(seed)
+
+    boards = (board_class('', hidden = False, rng = rng, geometry = geometry),
+              board_class('', hidden = True, rng = rng, geometry = geometry))
+    ais = (Player_AI(strategies[0], rng, opening_book, geometry), Player_AI(strategies[1], rng, opening_book, geometry))
+    turn = enemy_first(rng)
+    stats = Game_Stats(seed, turn)
+    if record:
+        stats.fleets = (boards[0].get_fleet(), boards[1].get_fleet())
+        stats.shot_log = []
 
-    # determine if enemy or player should start turn first
-    print(TEXTS['who starts', LANGUAGE], end='')
-    suspension()
-    if enemy_first():
-        print(TEXTS['enemy starts', LANGUAGE])
-        ai_turn(player_board, enemy_ai)
-        print_boards(player_board, enemy_board)
+    while True:
+        # AI shoots at the board of its opponent
+        board = boards[1 - turn]
+        ai = ais[turn]
+        ai.get_shoot_position(board)
+        report = ai.shoot(board)
+        if record:
+            stats.shot_log.append((ai.shoot_pos, report))
+
+        stats.shots[turn] += 1
+        if report == Report.HIT:
+            stats.hits[turn] += 1
+        elif report == Report.DESTROYED:
+            stats.hits[turn] += 1
+            ship = board.get_ship_by_cell(ai.shoot_pos)
+            stats.sink_order[turn].append(ship.get_size())
+            if board.are_all_ships_destroyed():
+                stats.winner = turn
+                return stats
+
+        turn = 1 - turn
+
+
+def iter_games(n_games, seed = None, board_class = Board, strategies = (Strategy.RANDOM, Strategy.RANDOM),
+               record = False, opening_book = None, geometry = None):
+    """ Play n_games headless AI vs AI games one by one (see simulate()). Yield Game_Stats
+        of every game as soon as it's finished, so they don't have to be kept in memory. """
+    seeds = random.Random(seed)
+    for _ in range(n_games):
+        yield play_game(seeds.getrandbits(64), board_class, strategies, record, opening_book, geometry)
+
+
+def simulate(n_games, seed = None, board_class = Board, strategies = (Strategy.RANDOM, Strategy.RANDOM), record = False,
+             opening_book = None, geometry = None):
+    """ Play n_games headless AI vs AI games. Every game gets its own seed drawn from
+        generator initialized with given seed, so any game can be repeated with play_game().
+        Return list of Game_Stats. """
+    return list(iter_games(n_games, seed, board_class, strategies, record, opening_book, geometry))
+
+
+def profile_games(n_games, seed = None, cprofile = True, trace_memory = False, **options):
+    """ Play n_games headless games (see simulate()) collecting metrics and optionally
+        cProfile statistics and tracemalloc snapshot.
+        Return Metrics, pstats.Stats (or None) and tracemalloc.Snapshot (or None). """
+    import cProfile, pstats, tracemalloc
+
+    profiler = cProfile.Profile() if cprofile else None
+    if trace_memory:
+        tracemalloc.start()
+    metrics = enable_metrics()
+    try:
+        if profiler is not None:
+            profiler.enable()
+        simulate(n_games, seed, **options)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        disable_metrics()
+        snapshot = tracemalloc.take_snapshot() if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+
+    stats = pstats.Stats(profiler) if profiler is not None else None
+    return metrics, stats, snapshot
+
+
+# names of the interactive game (options, texts, Renderer, Game) kept in battleship_cli, which is
+# imported on the first access of any of them
+CLI_NAMES = {'PLAYER_AI', 'SUSP_TIME', 'TURN_TIME', 'LANGUAGE', 'ANSI_RENDERER', 'TEXTS', 'LETTERS',
+             'Renderer', 'read_input', 'Game'}
+
+
+def __getattr__(name):
+    """ Return lazily built table or name of the interactive game, so importing the engine
+        doesn't build them or load asyncio. """
+    if name in LAZY_TABLES:
+        value = LAZY_TABLES[name]()
+    elif name in CLI_NAMES:
+        import battleship_cli
+        value = getattr(battleship_cli, name)
     else:
-        print(TEXTS['player starts', LANGUAGE])
-        
+        raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+    globals()[name] = value
+    return value
 
-    # main game loop
-    while True:
-        # player's turn - AI can be used as player
-        if PLAYER_AI:
-            ai_turn(enemy_board, player_ai, TEXTS['player ai', LANGUAGE])
-        else:
-            player_turn(enemy_board)
 
-        # check game over -> you win
-        if enemy_board.are_all_ships_destroyed():
-            print_boards(player_board, enemy_board)
-            game_over(player_win = True)
-            break
+def main():
+    """ Run interactive game (see battleship_cli). """
+    import battleship_cli
+    battleship_cli.main()
 
-        # print boards
-        print_boards(player_board, enemy_board)
-        
-        # enemy turn
-        ai_turn(player_board, enemy_ai)
-
-        # check game over -> you lose
-        if player_board.are_all_ships_destroyed():
-            enemy_board.show_all_ships()
-            print_boards(player_board, enemy_board)
-            game_over(player_win = False)
-            break
-
-        # print boards
-        print_boards(player_board, enemy_board)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,330 @@
+# Battleship - interactive game in terminal
+# Author: Jan Zalewski
+#
+# Texts, rendering and the game driver are kept apart from the engine (battleship.py), so
+# importing the engine is fast and they are loaded only when a human game starts.
+# Run: python battleship_cli.py (or python battleship.py)
+
+import asyncio, os, random, sys, threading
+
+from battleship import Board, CELL_VALUES, COORDS, GRID, POSITIONS, Player_AI, Report, \
+                       enemy_first, get_opening_book, to_index
+
+###### Additional options ######
+# AI plays as player
+PLAYER_AI = False
+
+# total suspension time in seconds
+SUSP_TIME = 2
+
+# AI's turn time in seconds
+TURN_TIME = 1
+
+# define game language ('en', 'pl')
+LANGUAGE = 'en'
+
+# draw boards side by side and redraw only changed cells (terminal must support ANSI escape codes),
+# used only when output is a terminal
+ANSI_RENDERER = True
+################################
+
+
+# In game texts in two languages (English, Polish)
+TEXTS = \
+{
+    ('your ships', 'en'): 'Your ships', ('your ships', 'pl'): 'Twoje statki', \
+    ('enemy ships', 'en'): 'Enemy ships', ('enemy ships', 'pl'): 'Statki przeciwnika', \
+    ('who starts', 'en'): 'Choosing who starts first', ('who starts', 'pl'): 'Losowanie zaczynającego pierwszą turę', \
+    ('player starts', 'en'): 'Player starts', ('player starts', 'pl'): 'Gracz zaczyna', \
+    ('enemy starts', 'en'): 'Enemy starts', ('enemy starts', 'pl'): 'Przeciwnik zaczyna', \
+    ('your turn', 'en'): 'Your turn', ('your turn', 'pl'): 'Twoja tura', \
+    ('enemy turn', 'en'): 'Enemy turn', ('enemy turn', 'pl'): 'Tura przeciwnika', \
+    ('player ai', 'en'): 'Player AI', ('player ai', 'pl'): 'AI gracza', \
+    ('missed', 'en'): 'Missed.', ('missed', 'pl'): 'Pudło.', \
+    ('hit', 'en'): 'Hit!', ('hit', 'pl'): 'Trafiony!', \
+    ('destroyed', 'en'): 'Destroyed!', ('destroyed', 'pl'): 'Trafiony zatopiony!', \
+    ('win', 'en'): 'You win!', ('win', 'pl'): 'Wygrałeś!', \
+    ('loose', 'en'): 'You loose!', ('loose', 'pl'): 'Przegrałeś!', \
+    ('play again', 'en'): 'Do you want to play again? (Y/N)?', ('play again', 'pl'): 'Chcesz zagrać jeszcze raz (T/N)?', \
+    ('thanks', 'en'): 'Thanks for playing!', ('thanks', 'pl'): 'Dzięki za grę!'
+}
+
+LETTERS = 'ABCDEFGHIJ'
+
+
+class Renderer:
+    """ Draws two boards side by side using ANSI escape codes. Whole frame is formatted
+        and written only on the first draw, later draws move cursor to cells that changed
+        since previous draw and rewrite just them. Text printed below boards is cleared
+        on every draw. """
+
+    # number of columns taken by one board
+    WIDTH = 36
+    # terminal row and column (counted from 1) of cell A1 of the left board
+    TOP = 6
+    LEFT = 7
+
+    def __init__(self, out = sys.stdout):
+        self.out = out
+        # drawn boards and their cells' states at the time of drawing
+        self.boards = None
+        self.states = None
+        # number of rows taken by boards
+        self.height = 0
+
+    def draw(self, board1, board2):
+        """ Draw boards in one write to the terminal. """
+        boards = (board1, board2)
+        if self.boards is None or self.boards[0] is not board1 or self.boards[1] is not board2:
+            text = self.__draw_frame(boards)
+        else:
+            text = self.__draw_changes(boards)
+        self.boards = boards
+        self.states = [bytes(board.cells) for board in boards]
+        self.out.write(text)
+        self.out.flush()
+
+    def __draw_frame(self, boards):
+        """ Return text clearing the screen and drawing both boards. """
+        blocks = []
+        for board in boards:
+            values = {POSITIONS[i] : CELL_VALUES[state] for i, state in enumerate(board.cells)}
+            # skip leading and trailing empty lines of the template
+            blocks.append(GRID.format(board.name, **values).split('\n')[1:-1])
+        self.height = len(blocks[0])
+        lines = [left.ljust(self.WIDTH) + right for left, right in zip(*blocks)]
+        return '\x1b[2J\x1b[H' + '\n'.join(lines) + '\n'
+
+    def __draw_changes(self, boards):
+        """ Return text redrawing cells that changed visible value and clearing text below boards. """
+        parts = []
+        for side, board in enumerate(boards):
+            left = self.LEFT + side * self.WIDTH
+            for i, (old, new) in enumerate(zip(self.states[side], board.cells)):
+                if CELL_VALUES[old] != CELL_VALUES[new]:
+                    x, y = COORDS[i]
+                    parts.append('\x1b[{};{}H{}'.format(self.TOP + y, left + 2 * x, CELL_VALUES[new]))
+        parts.append('\x1b[{};1H\x1b[J'.format(self.height + 1))
+        return ''.join(parts)
+
+
+def read_stdin_line():
+    """ Read line from standard input file descriptor byte by byte. Unlike input(), it doesn't
+        hold stdin's buffer lock, which daemon thread left blocked in it would keep at exit. """
+    line = bytearray()
+    while not line.endswith(b'\n'):
+        byte = os.read(sys.stdin.fileno(), 1)
+        if not byte:
+            if not line:
+                raise EOFError('EOF when reading a line')
+            break
+        line += byte
+    return line.decode(sys.stdin.encoding or 'utf-8', errors = 'replace').rstrip('\r\n')
+
+
+async def read_input():
+    """ Read line from standard input without blocking event loop. Line is read in daemon
+        thread, which (unlike executor's threads) isn't waited for when game is interrupted. """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def deliver(method, value):
+        # game may have stopped waiting for the line
+        if not future.done():
+            method(value)
+
+    def read():
+        try:
+            result = (future.set_result, read_stdin_line())
+        except Exception as error:
+            result = (future.set_exception, error)
+        try:
+            loop.call_soon_threadsafe(deliver, *result)
+        except RuntimeError:
+            # event loop was closed while line was being read
+            pass
+
+    threading.Thread(target = read, daemon = True).start()
+    return await future
+
+
+class Game:
+    """ Game driver: player (human or AI) against enemy's AI. Waiting for human input,
+        AI turns and cosmetic delays are awaitable, so many games can run in one event loop.
+        Options are kept per game, their defaults are the module's additional options. """
+
+    def __init__(self, player_ai = None, language = None, susp_time = None, turn_time = None,
+                 ansi_renderer = None, read_line = read_input, out = None, rng = None):
+        self.player_ai = PLAYER_AI if player_ai is None else player_ai
+        self.language = LANGUAGE if language is None else language
+        self.susp_time = SUSP_TIME if susp_time is None else susp_time
+        self.turn_time = TURN_TIME if turn_time is None else turn_time
+        self.ansi_renderer = ANSI_RENDERER if ansi_renderer is None else ansi_renderer
+        # coroutine function returning line typed by player, raises EOFError if player left
+        self.read_line = read_line
+        # file-like object (write and flush methods) for all game's output, standard output by default
+        self.out = sys.stdout if out is None else out
+        # generator of random numbers for boards, AIs and choosing who starts
+        self.rng = random if rng is None else rng
+        self.renderer = None
+
+    def is_terminal(self):
+        """ Check if game's output is a terminal. """
+        isatty = getattr(self.out, 'isatty', None)
+        return isatty is not None and isatty()
+
+    def text(self, key):
+        return TEXTS[key, self.language]
+
+    def print(self, text = '', end = '\n'):
+        self.out.write(text + end)
+        self.out.flush()
+
+    async def get_player_input(self):
+        """ Get position typed by player. Return its cell index. """
+        position = ''
+        while len(position) < 2 or \
+              position[0].upper() not in LETTERS or \
+              not (position[1:].isascii() and position[1:].isdecimal()) or \
+              int(position[1:]) not in range(1, 11):
+            self.print(self.text('your turn'))
+            position = (await self.read_line()).strip()
+
+        return to_index((LETTERS.index(position[0].upper()), int(position[1:]) - 1))
+
+    def print_report(self, report):
+        """ Print what has happened after shoot. """
+        if report == Report.MISSED:
+            self.print(self.text('missed'))
+        elif report == Report.HIT:
+            self.print(self.text('hit'))
+        elif report == Report.DESTROYED:
+            self.print(self.text('destroyed'))
+
+    async def suspension(self):
+        """ Print loading animation. """
+        dot_time = self.susp_time / 4
+
+        for _ in range(3):
+            await asyncio.sleep(dot_time)
+            self.print('.', end = '')
+        await asyncio.sleep(dot_time)
+        self.print()
+
+    async def player_turn(self, board):
+        """ Player types position and shoot. """
+
+        # Repeat if report is NOT_VALID
+        report = Report.NOT_VALID
+        while report == Report.NOT_VALID:
+            pos = await self.get_player_input()
+            report = board.shoot(pos)
+
+        await self.suspension()
+        self.print_report(report)
+        await asyncio.sleep(self.turn_time)
+
+    async def ai_turn(self, board, ai, name):
+        """ Turn made by AI. Similar to player_turn() method. """
+        self.print(name)
+        pos = ai.get_shoot_position(board)
+        await self.suspension()
+        self.print(POSITIONS[pos])
+        await asyncio.sleep(self.turn_time)
+        report = ai.shoot(board)
+        self.print_report(report)
+        await asyncio.sleep(self.turn_time)
+
+    def print_boards(self, board1, board2):
+        """ Print two boards using renderer or boards' format function. """
+        if self.renderer is not None:
+            self.renderer.draw(board1, board2)
+            return
+        self.print(board1.format())
+        self.print(board2.format())
+
+    async def game_over(self, player_win):
+        """ Print game over. Return True if player wants to play again. """
+
+        if player_win:
+            self.print(self.text('win') + ' ', end = '')
+        else:
+            self.print(self.text('loose') + ' ', end = '')
+
+        self.print(self.text('play again') + ': ')
+        yes_letter = 'Y' if self.language == 'en' else 'T'
+        if (await self.read_line()).strip().upper().startswith(yes_letter):
+            return True
+        else:
+            self.print(self.text('thanks'))
+            return False
+
+    async def play(self):
+        """ Play single game. Return True if player won. """
+
+        # new game initialization
+        player_board = Board(self.text('your ships'), hidden = False, rng = self.rng)
+        enemy_board = Board(self.text('enemy ships'), hidden = True, rng = self.rng)
+        # escape codes would only clutter output redirected to file or pipe
+        self.renderer = Renderer(self.out) if self.ansi_renderer and self.is_terminal() else None
+
+        # player is replaced by AI
+        if self.player_ai:
+            player_ai = Player_AI(rng = self.rng)
+
+        enemy_ai = Player_AI(rng = self.rng, opening_book = get_opening_book())
+
+        # print boards
+        self.print_boards(player_board, enemy_board)
+
+        # determine if enemy or player should start turn first
+        self.print(self.text('who starts'), end = '')
+        await self.suspension()
+        if enemy_first(self.rng):
+            self.print(self.text('enemy starts'))
+            await self.ai_turn(player_board, enemy_ai, self.text('enemy turn'))
+            self.print_boards(player_board, enemy_board)
+        else:
+            self.print(self.text('player starts'))
+
+        # main game loop
+        while True:
+            # player's turn - AI can be used as player
+            if self.player_ai:
+                await self.ai_turn(enemy_board, player_ai, self.text('player ai'))
+            else:
+                await self.player_turn(enemy_board)
+
+            # check game over -> you win
+            if enemy_board.are_all_ships_destroyed():
+                self.print_boards(player_board, enemy_board)
+                return True
+
+            # print boards
+            self.print_boards(player_board, enemy_board)
+
+            # enemy turn
+            await self.ai_turn(player_board, enemy_ai, self.text('enemy turn'))
+
+            # check game over -> you lose
+            if player_board.are_all_ships_destroyed():
+                enemy_board.show_all_ships()
+                self.print_boards(player_board, enemy_board)
+                return False
+
+            # print boards
+            self.print_boards(player_board, enemy_board)
+
+    async def run(self):
+        """ Play games until player doesn't want to play again. """
+        while await self.game_over(await self.play()):
+            pass
+
+
+def main():
+    """ Run interactive game. """
+    asyncio.run(Game().run())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+# Battleship - vectorized NumPy engine
+# Author: Jan Zalewski
+#
+# Optional backend for large scale AI evaluation. Requires numpy, which is not needed
+# to play the game. Many boards are kept in arrays of shape (N, 100) (cell index is
+# y * 10 + x, the same as in Bit_Board) and every call to Board_Batch.step() shoots
+# once at each unfinished board. choose_shots() does the same for Board and Bit_Board
+# objects of games in progress.
+
+import random
+
+import numpy as np
+
+import battleship
+
+
+# window covering unsunk hit is worth this many windows that don't cover any
+HIT_WEIGHT = 100
+
+# cell index -> boolean mask of the cell and its eight neighbours
+HALOS = np.array([[mask >> i & 1 for i in range(100)] for mask in battleship.HALO_MASKS], dtype = bool)
+
+# Report codes returned by Board_Batch.shoot()
+NOT_VALID = battleship.Report.NOT_VALID.value
+HIT = battleship.Report.HIT.value
+DESTROYED = battleship.Report.DESTROYED.value
+MISSED = battleship.Report.MISSED.value
+
+
+def window_sums(array, length, axis):
+    """ Return sums of all windows of given length sliding along given axis
+        (convolution with kernel of ones, only windows that fit in the board). """
+    array = np.moveaxis(array, axis, -1)
+    n = array.shape[-1] - length + 1
+    sums = array[..., :n].astype(np.int32)
+    for i in range(1, length):
+        sums += array[..., i : i + n]
+    return np.moveaxis(sums, -1, axis)
+
+
+def spread_windows(weights, length, axis):
+    """ For every cell return sum of weights of windows of given length covering it.
+        weights has one value per window start (board size - length + 1 along axis). """
+    weights = np.moveaxis(weights, axis, -1)
+    n = weights.shape[-1]
+    spread = np.zeros(weights.shape[:-1] + (n + length - 1,), dtype = np.int32)
+    for i in range(length):
+        spread[..., i : i + n] += weights
+    return np.moveaxis(spread, -1, axis)
+
+
+def fit_counts(blocked, hits, remaining):
+    """ Return ship fit density of shape (N, 10, 10).
+        blocked - (N, 10, 10) cells where no ship can be (missed, blocked around sunk ships)
+        hits - (N, 10, 10) hit cells of not yet destroyed ships
+        remaining - (N, 5) number of not yet destroyed ships of every size (index is size)
+        Every window free of blocked cells is counted for each remaining ship of its
+        length, windows covering hits have their weight increased by HIT_WEIGHT per hit. """
+    density = np.zeros(blocked.shape, dtype = np.int32)
+    for size in set(battleship.FLEET):
+        count = remaining[:, size, None, None]
+        # ships of size 1 have the same windows in both directions
+        axes = (1, 2) if size > 1 else (2,)
+        for axis in axes:
+            free = window_sums(blocked, size, axis) == 0
+            weights = free * (1 + HIT_WEIGHT * window_sums(hits, size, axis)) * count
+            density += spread_windows(weights, size, axis)
+    return density
+
+
+class Board_Batch:
+    """ N boards with randomly placed fleets shot by density AI in lockstep. """
+
+    def __init__(self, n, seed = None):
+        # fleets are drawn from own generator, global random state is not touched
+        fleets = random.Random(seed)
+        self.n = n
+        self.rng = np.random.default_rng(seed)
+        n_ships = len(battleship.FLEET)
+        # index of the ship for every cell, -1 if cell is empty
+        self.ship_ids = np.full((n, 100), -1, dtype = np.int8)
+        self.ship_sizes = np.zeros((n, n_ships), dtype = np.int8)
+        self.ship_bodies = np.zeros((n, n_ships, 100), dtype = bool)
+        self.ship_halos = np.zeros((n, n_ships, 100), dtype = bool)
+        for board in range(n):
+            for ship, placement in enumerate(battleship.get_random_fleet(fleets)):
+                cells = list(placement.cells)
+                self.ship_ids[board, cells] = ship
+                self.ship_sizes[board, ship] = placement.size
+                self.ship_bodies[board, ship, cells] = True
+                self.ship_halos[board, ship] = HALOS[cells].any(axis = 0)
+        self.active_units = self.ship_sizes.copy()
+
+        self.shots = np.zeros((n, 100), dtype = bool)
+        # missed cells and cells around sunk ships (including their bodies)
+        self.blocked = np.zeros((n, 100), dtype = bool)
+        # hit cells of not yet destroyed ships
+        self.hits = np.zeros((n, 100), dtype = bool)
+        self.remaining = np.zeros((n, 5), dtype = np.int8)
+        for size in set(battleship.FLEET):
+            self.remaining[:, size] = battleship.FLEET.count(size)
+        self.shots_count = np.zeros(n, dtype = np.int32)
+        self.done = np.zeros(n, dtype = bool)
+
+    def density(self, rows = slice(None)):
+        """ Return ship fit density of boards with given indexes (all by default),
+            shape (len(rows), 10, 10). """
+        blocked = self.blocked[rows].reshape(-1, 10, 10)
+        hits = self.hits[rows].reshape(-1, 10, 10)
+        return fit_counts(blocked, hits, self.remaining[rows])
+
+    def choose(self):
+        """ Return index of cell with the highest density for every board (ties are broken
+            randomly), -1 for boards that are already finished. """
+        rows = np.nonzero(~self.done)[0]
+        density = self.density(rows).reshape(len(rows), 100) + self.rng.random((len(rows), 100))
+        density[self.shots[rows] | self.blocked[rows]] = -1
+        cells = np.full(self.n, -1, dtype = np.int64)
+        cells[rows] = density.argmax(axis = 1)
+        return cells
+
+    def shoot(self, cells):
+        """ Shoot at given cell of every board. Return array of Report values. """
+        reports = np.full(self.n, NOT_VALID, dtype = np.int8)
+        rows = np.nonzero(~self.done & (cells >= 0))[0]
+        cells = cells[rows]
+        valid = ~(self.shots[rows, cells] | self.blocked[rows, cells])
+        rows, cells = rows[valid], cells[valid]
+
+        self.shots[rows, cells] = True
+        self.shots_count[rows] += 1
+        ships = self.ship_ids[rows, cells]
+        hit = ships >= 0
+
+        reports[rows[~hit]] = MISSED
+        self.blocked[rows[~hit], cells[~hit]] = True
+
+        rows, cells, ships = rows[hit], cells[hit], ships[hit]
+        reports[rows] = HIT
+        self.hits[rows, cells] = True
+        self.active_units[rows, ships] -= 1
+
+        sunk = self.active_units[rows, ships] == 0
+        rows, ships = rows[sunk], ships[sunk]
+        reports[rows] = DESTROYED
+        self.blocked[rows] |= self.ship_halos[rows, ships]
+        self.hits[rows] &= ~self.ship_bodies[rows, ships]
+        self.remaining[rows, self.ship_sizes[rows, ships]] -= 1
+        self.done[rows] = self.remaining[rows].sum(axis = 1) == 0
+
+        return reports
+
+    def step(self):
+        """ Shoot once at every unfinished board. Return array of Report values. """
+        return self.shoot(self.choose())
+
+    def run(self):
+        """ Shoot until all boards are finished. Return number of shots for every board. """
+        while not self.done.all():
+            self.step()
+        return self.shots_count
+
+
+def simulate_batch(n_boards, seed = None):
+    """ Play density AI against n_boards random fleets at once. Return array with numbers
+        of shots needed to destroy every fleet. """
+    return Board_Batch(n_boards, seed).run()
+
+
+
+def get_states(boards):
+    """ Return what the shooter knows about given Boards or Bit_Boards (not mixed) as arrays:
+        shot (N, 100), blocked (N, 100), hits (N, 100) - see Board_Batch, and remaining (N, 5). """
+    n = len(boards)
+    if isinstance(boards[0], battleship.Bit_Board):
+        hit = np.frombuffer(b''.join(board.hits.to_bytes(13, 'little') for board in boards), dtype = np.uint8)
+        hit = np.unpackbits(hit.reshape(n, 13), axis = 1, bitorder = 'little')[:, :100].astype(bool)
+        missed = np.frombuffer(b''.join(board.misses.to_bytes(13, 'little') for board in boards), dtype = np.uint8)
+        missed = np.unpackbits(missed.reshape(n, 13), axis = 1, bitorder = 'little')[:, :100].astype(bool)
+        owners = np.frombuffer(b''.join(board.owners for board in boards), dtype = np.uint8).reshape(n, 100)
+        sunk = [[not mask & ~board.hits for mask in board.ship_masks] for board in boards]
+    else:
+        cells = np.frombuffer(b''.join(board.cells for board in boards), dtype = np.uint8).reshape(n, 100)
+        hit = cells & battleship.CELL_DESTROYED != 0
+        missed = cells & battleship.CELL_MISSED != 0
+        owners = np.frombuffer(b''.join(board.ship_ids for board in boards), dtype = np.uint8).reshape(n, 100)
+        sunk = [[ship.active_units == 0 for ship in board.ships] for board in boards]
+
+    # sunk[board, ship + 1] - ship is destroyed (owners are ship indexes + 1, 0 for empty cells)
+    sunk = np.pad(np.array(sunk, dtype = bool), ((0, 0), (1, 0)))
+    sizes = np.array([0] + list(battleship.FLEET))
+    sunk_cells = sunk[np.arange(n)[:, None], owners]
+    remaining = np.zeros((n, 5), dtype = np.int8)
+    for size in set(battleship.FLEET):
+        remaining[:, size] = battleship.FLEET.count(size) - (sunk & (sizes == size)).sum(axis = 1)
+    return hit | missed, missed | sunk_cells, hit & ~sunk_cells, remaining
+
+
+def choose_shots(boards, rng = None):
+    """ Return list with the next cell index to shoot for every board in progress (Board or
+        Bit_Board with the default geometry): the cell with the highest density of remaining
+        ships (see fit_counts()), ties are broken randomly. All boards are evaluated at once. """
+    rng = np.random.default_rng() if rng is None else rng
+    shot, blocked, hits, remaining = get_states(boards)
+    density = fit_counts(blocked.reshape(-1, 10, 10), hits.reshape(-1, 10, 10), remaining).reshape(-1, 100)
+    density = density + rng.random(density.shape)
+    density[shot | blocked] = -1
+    return density.argmax(axis = 1).tolist()
+
+
+def play_boards(boards, rng = None):
+    """ Shoot at all boards in lockstep with choose_shots() until all ships are destroyed.
+        Return number of shots for every board. """
+    rng = np.random.default_rng() if rng is None else rng
+    shots = [0] * len(boards)
+    active = [i for i, board in enumerate(boards) if not board.are_all_ships_destroyed()]
+    while active:
+        cells = choose_shots([boards[i] for i in active], rng)
+        unfinished = []
+        for i, cell in zip(active, cells):
+            board = boards[i]
+            report = board.shoot(cell)
+            shots[i] += 1
+            if report != battleship.Report.DESTROYED or not board.are_all_ships_destroyed():
+                unfinished.append(i)
+        active = unfinished
+    return shots
@@ -0,0 +1,142 @@
+# Battleship - benchmarks of hot paths
+# Author: Jan Zalewski
+#
+# Every benchmark starts from the same seed, so results of different runs, board
+# backends (Board, Bit_Board) and AI strategies are measured on the same games.
+# Run: python benchmark.py [--games N] [--backend Board|Bit_Board] [--strategy RANDOM|DENSITY|MONTE_CARLO]
+
+import argparse, random, time, tracemalloc
+
+import battleship
+from battleship import Player_AI, Report, Strategy
+
+SEED = 12345
+
+
+class Result:
+    """ Result of single benchmark. """
+
+    def __init__(self, name, ops, seconds, allocated = None):
+        self.name = name
+        self.ops = ops
+        self.seconds = seconds
+        # bytes allocated at peak per operation, measured in separate run
+        self.allocated = allocated
+
+    def __repr__(self):
+        allocated = '' if self.allocated is None else '{:12.0f} B/op'.format(self.allocated)
+        return '{:40} {:12.0f} ops/s {:10.2f} us/op {}'.format(
+            self.name, self.ops_per_sec(), self.seconds / self.ops * 1e6, allocated)
+
+    def ops_per_sec(self):
+        return self.ops / self.seconds if self.seconds else float('inf')
+
+
+def measure_allocations(run):
+    """ Call run() with tracemalloc enabled. Return peak of bytes allocated by it. """
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        run()
+        return tracemalloc.get_traced_memory()[1] - start
+    finally:
+        tracemalloc.stop()
+
+
+def bench_board_init(board_class, n):
+    """ Fleet generation and board construction. """
+    def run():
+        for _ in range(n):
+            board_class('')
+    random.seed(SEED)
+    start = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - start
+    random.seed(SEED)
+    allocated = measure_allocations(lambda: board_class(''))
+    return Result('{}.__init__'.format(board_class.__name__), n, seconds, allocated)
+
+
+def get_target(board, report):
+    """ Return cell which shot at fresh board gives given report. """
+    fleet = board.get_fleet()
+    if report == Report.MISSED:
+        ships = {cell for ship in fleet for cell in ship}
+        return next(cell for cell in range(100) if cell not in ships)
+    if report == Report.HIT:
+        return fleet[0][0]
+    return fleet[-1][0]
+
+
+def bench_shoot(board_class, report, n):
+    """ Single shot at fresh board resulting in given report (sinking shot hits ship of size 1). """
+    random.seed(SEED)
+    boards = [board_class('') for _ in range(n)]
+    targets = [get_target(board, report) for board in boards]
+    start = time.perf_counter()
+    for board, cell in zip(boards, targets):
+        board.shoot(cell)
+    seconds = time.perf_counter() - start
+
+    random.seed(SEED)
+    board = board_class('')
+    cell = get_target(board, report)
+    allocated = measure_allocations(lambda: board.shoot(cell))
+    return Result('{}.shoot ({})'.format(board_class.__name__, report.name), n, seconds, allocated)
+
+
+def bench_ai(board_class, strategy, games):
+    """ Player_AI.get_shoot_position and Player_AI.shoot measured call by call during full
+        games (includes small overhead of reading the clock). """
+    random.seed(SEED)
+    choose = shoot = 0.0
+    calls = 0
+    for _ in range(games):
+        board = board_class('')
+        ai = Player_AI(strategy)
+        while not board.are_all_ships_destroyed():
+            start = time.perf_counter()
+            ai.get_shoot_position(board)
+            middle = time.perf_counter()
+            ai.shoot(board)
+            choose += middle - start
+            shoot += time.perf_counter() - middle
+            calls += 1
+    name = 'Player_AI({}).'.format(strategy.name)
+    return [Result(name + 'get_shoot_position', calls, choose), Result(name + 'shoot', calls, shoot)]
+
+
+def bench_games(board_class, strategy, games):
+    """ Full headless AI vs AI games and memory allocated at peak by one game. """
+    strategies = (strategy, strategy)
+    start = time.perf_counter()
+    battleship.simulate(games, SEED, board_class, strategies)
+    seconds = time.perf_counter() - start
+    allocated = measure_allocations(lambda: battleship.play_game(SEED, board_class, strategies))
+    return Result('play_game ({}, {})'.format(board_class.__name__, strategy.name), games, seconds, allocated)
+
+
+def run_benchmarks(board_class = battleship.Board, strategy = Strategy.RANDOM, games = 1000):
+    """ Run all benchmarks. Return list of Results. """
+    results = [bench_board_init(board_class, games)]
+    for report in (Report.MISSED, Report.HIT, Report.DESTROYED):
+        results.append(bench_shoot(board_class, report, games * 10))
+    results += bench_ai(board_class, strategy, max(games // 10, 1))
+    results.append(bench_games(board_class, strategy, max(games // 10, 1)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Benchmark battleship hot paths.')
+    parser.add_argument('--games', type = int, default = 1000)
+    parser.add_argument('--backend', choices = ('Board', 'Bit_Board'), default = 'Board')
+    parser.add_argument('--strategy', choices = [strategy.name for strategy in Strategy], default = 'RANDOM')
+    args = parser.parse_args()
+
+    for result in run_benchmarks(getattr(battleship, args.backend), Strategy[args.strategy], args.games):
+        print(result)
+
+
+if __name__ == '__main__':
+    main()
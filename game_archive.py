@@ -0,0 +1,140 @@
+# Battleship - memory-mapped archive of game records
+# Author: Jan Zalewski
+#
+# Archive is a pair of append-only files: data file with records written one after
+# another (see game_record.py) and index file with one fixed-width entry per game:
+#   offset of record in data file   8 bytes
+#   length of record                2 bytes
+#   winner                          1 byte
+#   number of shots                 2 bytes
+# Game id is the number of entry in index file. Both files are read with mmap, so
+# games can be looked up or filtered without reading whole archive into memory.
+# Record is flushed before its index entry is written, so entries of complete records
+# form a prefix of index file; reader ignores entries (of game being written or lost
+# in a crash) pointing past the end of data file and writer drops them on open.
+
+import mmap, os, struct
+
+import battleship
+from game_record import Game_Record, MAGIC, check_options
+
+INDEX_ENTRY = struct.Struct('<QHBH')
+
+
+class Game_Archive:
+    """ Appends game records to archive at given path (index is kept in path + '.idx'). """
+
+    def __init__(self, path):
+        self.data = open(path, 'ab')
+        # index is also read on open to drop entries of incomplete records
+        self.index = open(path + '.idx', 'a+b')
+        if self.data.tell() == 0:
+            self.data.write(MAGIC)
+        # number of games already in archive
+        self.games = self.__complete_games()
+        # drop partial entry and entries of lost records, so new entries follow complete ones
+        self.index.truncate(self.games * INDEX_ENTRY.size)
+
+    def __complete_games(self):
+        """ Return number of index entries whose records are complete in data file. """
+        data_size = self.data.tell()
+        games = self.index.tell() // INDEX_ENTRY.size
+        while games:
+            self.index.seek((games - 1) * INDEX_ENTRY.size)
+            offset, length, _, _ = INDEX_ENTRY.unpack(self.index.read(INDEX_ENTRY.size))
+            if offset + length <= data_size:
+                break
+            games -= 1
+        return games
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def append(self, record):
+        """ Add record to archive. Return its game id. """
+        data = record.to_bytes()
+        offset = self.data.tell()
+        self.data.write(data)
+        # files are buffered separately, record has to reach data file before its index entry
+        self.data.flush()
+        self.index.write(INDEX_ENTRY.pack(offset, len(data), record.winner, len(record.shots)))
+        self.index.flush()
+        self.games += 1
+        return self.games - 1
+
+    def close(self):
+        self.data.close()
+        self.index.close()
+
+
+class Archive_Reader:
+    """ Random access to games stored in archive. """
+
+    def __init__(self, path):
+        self.files = [open(path, 'rb'), open(path + '.idx', 'rb')]
+        self.data = self.__map(self.files[0])
+        self.index = self.__map(self.files[1])
+        if self.data[:len(MAGIC)] != MAGIC:
+            raise ValueError('Not a battleship archive')
+        # number of games with complete records, entries after them are ignored
+        self.length = len(self.index) // INDEX_ENTRY.size
+        while self.length:
+            offset, length, _, _ = self.entry(self.length - 1)
+            if offset + length <= len(self.data):
+                break
+            self.length -= 1
+
+    def __map(self, file):
+        if os.fstat(file.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, game_id):
+        """ Return Game_Record of game with given id. """
+        offset, length, _, _ = self.entry(game_id)
+        return Game_Record.from_bytes(self.data[offset : offset + length])[0]
+
+    def entry(self, game_id):
+        """ Return (offset, length, winner, shots) index entry of game with given id. """
+        if not 0 <= game_id < len(self):
+            raise IndexError('game id out of range')
+        return INDEX_ENTRY.unpack_from(self.index, game_id * INDEX_ENTRY.size)
+
+    def filter(self, min_shots = None, max_shots = None, winner = None):
+        """ Yield ids of games matching given conditions. Only index is read. """
+        for game_id in range(len(self)):
+            _, _, game_winner, shots = INDEX_ENTRY.unpack_from(self.index, game_id * INDEX_ENTRY.size)
+            if min_shots is not None and shots < min_shots:
+                continue
+            if max_shots is not None and shots > max_shots:
+                continue
+            if winner is not None and game_winner != winner:
+                continue
+            yield game_id
+
+    def close(self):
+        for mapped in (self.data, self.index):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+        for file in self.files:
+            file.close()
+
+
+def archive_games(path, n_games, seed = None, **options):
+    """ Play n_games AI vs AI games (see battleship.simulate()) one by one and append them to archive. """
+    check_options(options)
+    with Game_Archive(path) as archive:
+        for stats in battleship.iter_games(n_games, seed, record = True, **options):
+            archive.append(Game_Record.from_stats(stats))
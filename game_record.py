@@ -0,0 +1,159 @@
+# Battleship - compact binary game records and replay
+# Author: Jan Zalewski
+#
+# Record of a single game (all numbers little endian):
+#   seed          8 bytes
+#   flags         1 byte   (bit 0 - index of AI that shot first, bit 1 - index of winner)
+#   fleets        2 * 20 bytes, cell indexes of all ships' units of both boards in FLEET order
+#   shots count   2 bytes
+#   shots         1 byte per shot, cell index
+#   reports       2 bits per shot (Report value), 4 reports per byte
+# File starts with MAGIC followed by records one after another.
+
+import struct
+
+import battleship
+from battleship import Board, FLEET, PLACEMENT_BY_CELLS, Report
+
+MAGIC = b'BSR1'
+
+HEADER = struct.Struct('<QB40sH')
+
+# number of cells taken by all ships of one board
+FLEET_CELLS = sum(FLEET)
+
+REPORTS = {report.value : report for report in Report}
+
+
+def check_options(options):
+    """ Raise ValueError if games played with given options (see battleship.simulate())
+        can't be recorded. Records keep fleets and shots of the default board only. """
+    geometry = options.get('geometry')
+    if geometry is not None and geometry != battleship.GEOMETRY:
+        raise ValueError('Only games on the default board can be recorded')
+
+
+class Game_Record:
+    """ Everything needed to reconstruct any turn of AI vs AI game. """
+
+    def __init__(self, seed, first, winner, fleets, shots, reports):
+        self.seed = seed
+        self.first = first
+        self.winner = winner
+        # two lists of tuples with cell indexes of ships (index 0 - player's board)
+        self.fleets = fleets
+        # cell indexes of all shots in order and Report for each of them
+        self.shots = shots
+        self.reports = reports
+
+    def __repr__(self):
+        return 'Game_Record(seed={}, first={}, winner={}, shots={})'.format(
+            self.seed, self.first, self.winner, len(self.shots))
+
+    @classmethod
+    def from_stats(cls, stats):
+        """ Create record from Game_Stats of game played with record = True. """
+        return cls(stats.seed, stats.first, stats.winner, stats.fleets,
+                   [cell for cell, _ in stats.shot_log], [report for _, report in stats.shot_log])
+
+    def to_bytes(self):
+        """ Return record as bytes. Raise ValueError if game wasn't played on the default board. """
+        cells = [cell for fleet in self.fleets for ship in fleet for cell in ship]
+        if any(tuple(len(ship) for ship in fleet) != FLEET for fleet in self.fleets) or \
+           len(cells) != 2 * FLEET_CELLS or any(cell >= 100 for cell in cells + list(self.shots)):
+            raise ValueError('Only games on the default board can be recorded')
+        fleets = bytes(cells)
+        reports = bytearray((len(self.shots) + 3) // 4)
+        for i, report in enumerate(self.reports):
+            reports[i // 4] |= report.value << (i % 4 * 2)
+        flags = self.first | self.winner << 1
+        return HEADER.pack(self.seed, flags, fleets, len(self.shots)) + bytes(self.shots) + bytes(reports)
+
+    @classmethod
+    def from_bytes(cls, data, offset = 0):
+        """ Read record starting at offset. Return record and its size in bytes. """
+        seed, flags, cells, count = HEADER.unpack_from(data, offset)
+        start = offset + HEADER.size
+        shots = list(data[start : start + count])
+        packed = data[start + count : start + count + (count + 3) // 4]
+        reports = [REPORTS[packed[i // 4] >> (i % 4 * 2) & 3] for i in range(count)]
+
+        fleets = []
+        for board in range(2):
+            fleet = []
+            position = board * FLEET_CELLS
+            for size in FLEET:
+                fleet.append(tuple(cells[position : position + size]))
+                position += size
+            fleets.append(fleet)
+
+        record = cls(seed, flags & 1, flags >> 1 & 1, fleets, shots, reports)
+        return record, HEADER.size + count + (count + 3) // 4
+
+    def replay(self, turn = None, board_class = Board):
+        """ Return player's and enemy's boards after given number of shots (all shots by default).
+            Raise ValueError if replayed report differs from the recorded one. """
+        boards = [board_class('', hidden = False, fleet = [PLACEMENT_BY_CELLS[ship] for ship in fleet])
+                  for fleet in self.fleets]
+        shooter = self.first
+        for cell, report in list(zip(self.shots, self.reports))[:turn]:
+            if boards[1 - shooter].shoot(cell) != report:
+                raise ValueError('Record does not match replayed game')
+            shooter = 1 - shooter
+        return boards
+
+
+class Record_Writer:
+    """ Writes records one by one to binary file. """
+
+    def __init__(self, file):
+        self.file = file
+        self.file.write(MAGIC)
+
+    def write(self, record):
+        self.file.write(record.to_bytes())
+
+
+class Record_Reader:
+    """ Iterates over records from binary file written by Record_Writer. Reads file in
+        chunks, so files larger than memory can be read. """
+
+    CHUNK_SIZE = 1 << 20
+
+    def __init__(self, file):
+        self.file = file
+        if self.file.read(len(MAGIC)) != MAGIC:
+            raise ValueError('Not a battleship record file')
+
+    def __iter__(self):
+        buffer = b''
+        offset = 0
+        while True:
+            chunk = self.file.read(self.CHUNK_SIZE)
+            buffer = buffer[offset:] + chunk
+            offset = 0
+            while True:
+                # check if whole record is already in buffer
+                if len(buffer) - offset < HEADER.size:
+                    break
+                count = HEADER.unpack_from(buffer, offset)[3]
+                if len(buffer) - offset < HEADER.size + count + (count + 3) // 4:
+                    break
+                record, size = Game_Record.from_bytes(buffer, offset)
+                offset += size
+                yield record
+            if not chunk:
+                if offset != len(buffer):
+                    raise ValueError('Truncated battleship record file')
+                return
+
+
+def record_games(path, n_games, seed = None, **options):
+    """ Play n_games AI vs AI games (see battleship.simulate()) and write their records
+        to file. Games are played and written one by one. Return number of written bytes. """
+    check_options(options)
+    with open(path, 'wb') as file:
+        writer = Record_Writer(file)
+        for stats in battleship.iter_games(n_games, seed, record = True, **options):
+            writer.write(Game_Record.from_stats(stats))
+        return file.tell()
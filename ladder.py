@@ -0,0 +1,156 @@
+# Battleship - ladder of AI strategies with Elo ratings
+# Author: Jan Zalewski
+#
+# Every registered strategy (see battleship.STRATEGIES) plays every other strategy. Ratings
+# are updated after every game and kept with numbers of played games in a JSON state file,
+# so when a new strategy is registered only its games have to be played. Games of every
+# pair of strategies have seeds drawn from generator initialized with the ladder's seed and
+# names of both strategies, so the same games are played no matter when they are played.
+# Run: python ladder.py GAMES [--seed N] [--state PATH] [--processes N]
+
+import argparse, json, multiprocessing, os, random
+
+import battleship
+
+# rating of strategy that has not played yet
+INITIAL_RATING = 1500
+
+# maximum change of rating after single game
+K_FACTOR = 16
+
+
+def expected_score(rating, opponent_rating):
+    """ Return expected score (probability of winning) of player with given rating. """
+    return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+
+def get_game_seeds(seed, first, second, start, n_games):
+    """ Return seeds of games from start to start + n_games of given pair of strategies. """
+    seeds = random.Random('{}:{}:{}'.format(seed, first, second))
+    for _ in range(start):
+        seeds.getrandbits(64)
+    return [seeds.getrandbits(64) for _ in range(n_games)]
+
+
+def register_strategies(strategies):
+    """ Worker initializer. Register strategies (name -> class) in worker process, so strategies
+        registered at runtime are known also to workers that don't inherit parent's memory. """
+    for name, strategy_class in strategies.items():
+        battleship.register_strategy(name, strategy_class)
+
+
+def play_games(job):
+    """ Worker function. Play games with given seeds, return list of winners (0 - first strategy). """
+    first, second, seeds = job
+    return [battleship.play_game(seed, strategies = (first, second)).winner for seed in seeds]
+
+
+class Ladder:
+    """ Elo ratings of strategies and numbers of games played by every pair of them. """
+
+    def __init__(self, seed = 0):
+        self.seed = seed
+        # strategy name -> rating
+        self.ratings = {}
+        # strategy name -> number of games played
+        self.games = {}
+        # 'FIRST:SECOND' -> number of games played by the pair and number of games first won
+        self.pairs = {}
+
+    def __repr__(self):
+        return '\n'.join('{:20} {:7.1f} {:8}'.format(name, rating, self.games[name])
+                         for name, rating in self.get_ranking())
+
+    @classmethod
+    def load(cls, path):
+        """ Return ladder saved in given file or new ladder if file doesn't exist. """
+        ladder = cls()
+        if os.path.exists(path):
+            with open(path) as file:
+                state = json.load(file)
+            ladder.seed = state['seed']
+            ladder.ratings = state['ratings']
+            ladder.games = state['games']
+            ladder.pairs = state['pairs']
+        return ladder
+
+    def save(self, path):
+        state = {'seed' : self.seed, 'ratings' : self.ratings, 'games' : self.games, 'pairs' : self.pairs}
+        # write to temporary file first, so the state is never left half written
+        with open(path + '.tmp', 'w') as file:
+            json.dump(state, file, indent = 1)
+        os.replace(path + '.tmp', path)
+
+    def add_strategy(self, name):
+        if name not in self.ratings:
+            self.ratings[name] = INITIAL_RATING
+            self.games[name] = 0
+
+    def add_result(self, first, second, winner):
+        """ Update ratings after game of two strategies (winner 0 - first strategy won). """
+        score = 1 - winner
+        change = K_FACTOR * (score - expected_score(self.ratings[first], self.ratings[second]))
+        self.ratings[first] += change
+        self.ratings[second] -= change
+        self.games[first] += 1
+        self.games[second] += 1
+        played, won = self.pairs.get(first + ':' + second, (0, 0))
+        self.pairs[first + ':' + second] = (played + 1, won + score)
+
+    def get_ranking(self):
+        """ Return list of (name, rating) pairs, the best strategy first. """
+        return sorted(self.ratings.items(), key = lambda item: -item[1])
+
+    def get_jobs(self, names, n_games, shard_size):
+        """ Yield jobs (see play_games()) with games missing to n_games for every pair of strategies. """
+        for i, first in enumerate(names):
+            for second in names[i + 1:]:
+                played = self.pairs.get(first + ':' + second, (0, 0))[0]
+                for start in range(played, n_games, shard_size):
+                    count = min(shard_size, n_games - start)
+                    yield first, second, get_game_seeds(self.seed, first, second, start, count)
+
+    def run(self, n_games, names = None, processes = None, shard_size = 100, callback = None):
+        """ Play games, so every pair of strategies (all registered by default) has n_games
+            games. Ratings are updated as results of shards come in (in the same order every
+            time, so results don't depend on number of processes); optional callback is called
+            with ladder after every shard, e.g. to save it. """
+        names = sorted(battleship.STRATEGIES if names is None else names)
+        for name in names:
+            self.add_strategy(name)
+
+        jobs = list(self.get_jobs(names, n_games, shard_size))
+        if processes == 1:
+            results = map(play_games, jobs)
+            self.__add_results(jobs, results, callback)
+            return
+        strategies = {name : battleship.STRATEGIES[name] for name in names}
+        with multiprocessing.Pool(processes, register_strategies, (strategies,)) as pool:
+            self.__add_results(jobs, pool.imap(play_games, jobs), callback)
+
+    def __add_results(self, jobs, results, callback):
+        for (first, second, _), winners in zip(jobs, results):
+            for winner in winners:
+                self.add_result(first, second, winner)
+            if callback is not None:
+                callback(self)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Rate battleship AI strategies against each other.')
+    parser.add_argument('games', type = int, help = 'number of games of every pair of strategies')
+    parser.add_argument('--seed', type = int, default = 0, help = 'used only when new state is created')
+    parser.add_argument('--state', default = 'ladder.json')
+    parser.add_argument('--processes', type = int, default = None, help = 'default: number of cores')
+    args = parser.parse_args()
+
+    ladder = Ladder.load(args.state)
+    if not ladder.ratings:
+        ladder.seed = args.seed
+    ladder.run(args.games, processes = args.processes, callback = lambda ladder: ladder.save(args.state))
+    ladder.save(args.state)
+    print(ladder)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+# Battleship - opening book generator
+# Author: Jan Zalewski
+#
+# Opening book is a list of cells that AI shoots at the beginning of the game, before any
+# ship is hit. It is built greedily from many random fleets (the same distribution as
+# fleets placed by Board): the next cell is the one occupied by ship in the largest number
+# of fleets that none of the previous cells hit.
+# Run: python opening_book.py [--fleets N] [--length N] [--seed N] [--output PATH]
+
+import argparse, random
+
+import battleship
+from battleship import OPENING_MAGIC
+
+
+def build_opening_book(n_fleets = 200000, length = 20, seed = None):
+    """ Return tuple of cell indexes of opening book built from n_fleets random fleets. """
+    rng = random.Random(seed)
+    fleets = [tuple(cell for placement in battleship.get_random_fleet(rng) for cell in placement.cells)
+              for _ in range(n_fleets)]
+
+    book = []
+    while len(book) < length and fleets:
+        counts = [0] * 100
+        for fleet in fleets:
+            for cell in fleet:
+                counts[cell] += 1
+        for cell in book:
+            counts[cell] = -1
+        best = max(range(100), key = counts.__getitem__)
+        book.append(best)
+        # the following cells are chosen for fleets that the book didn't hit yet
+        fleets = [fleet for fleet in fleets if best not in fleet]
+    return tuple(book)
+
+
+def save_opening_book(path, cells):
+    with open(path, 'wb') as file:
+        file.write(OPENING_MAGIC + bytes([len(cells)]) + bytes(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Build battleship opening book.')
+    parser.add_argument('--fleets', type = int, default = 200000)
+    parser.add_argument('--length', type = int, default = 20)
+    parser.add_argument('--seed', type = int, default = 1)
+    parser.add_argument('--output', default = battleship.OPENING_BOOK_PATH)
+    args = parser.parse_args()
+
+    cells = build_opening_book(args.fleets, args.length, args.seed)
+    save_opening_book(args.output, cells)
+    print(' '.join(battleship.POSITIONS[cell] for cell in cells))
+
+
+if __name__ == '__main__':
+    main()
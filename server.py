@@ -0,0 +1,256 @@
+# Battleship - multi-game TCP server and load test client
+# Author: Jan Zalewski
+#
+# Line protocol: after connecting client sends mode and optionally language, e.g. 'AI en'
+# (play against AI) or 'HUMAN pl' (wait for another player). Then the game is played
+# exactly like in terminal: positions are sent as lines, e.g. 'A1'.
+
+import argparse, asyncio, logging, random, time
+
+from battleship import Board, POSITIONS, Report
+from battleship_cli import Game, TEXTS
+
+WELCOME = "Battleship server. Type mode and language: 'AI en', 'AI pl', 'HUMAN en' or 'HUMAN pl'"
+
+OPPONENT_LEFT = 'Opponent left the game.'
+
+log = logging.getLogger(__name__)
+
+
+class Connection:
+    """ Connected player. Used by Game as its input (read_line) and output (write, flush). """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.language = 'en'
+
+    async def read_line(self):
+        """ Return line sent by player, raise EOFError if player disconnected. """
+        await self.writer.drain()
+        line = await self.reader.readline()
+        if not line:
+            raise EOFError
+        return line.decode(errors = 'replace')
+
+    def write(self, text):
+        if not self.writer.is_closing():
+            self.writer.write(text.replace('\n', '\r\n').encode())
+
+    def flush(self):
+        pass
+
+
+class Duel:
+    """ Game between two connected players. Each player shoots at the other's board,
+        every player sees texts in own language. """
+
+    def __init__(self, connections, susp_time = 0, turn_time = 0, rng = None):
+        # generator of random numbers of this duel only (boards and who starts)
+        self.rng = random.Random() if rng is None else rng
+        # Game objects are used only for players' input and output
+        self.views = [Game(False, connection.language, susp_time, turn_time, False,
+                           connection.read_line, connection) for connection in connections]
+        self.boards = [Board('', hidden = True, rng = self.rng), Board('', hidden = True, rng = self.rng)]
+
+    def print_boards(self):
+        for i, view in enumerate(self.views):
+            view.print(self.boards[i].format(view.text('your ships'), show_hidden = True))
+            view.print(self.boards[1 - i].format(view.text('enemy ships')))
+
+    async def play(self):
+        """ Play game until one player destroys all ships or leaves. """
+        turn = self.rng.randint(0, 1)
+        self.views[turn].print(self.views[turn].text('player starts'))
+        self.views[1 - turn].print(self.views[1 - turn].text('enemy starts'))
+
+        try:
+            while True:
+                self.print_boards()
+                shooter, target = self.views[turn], self.boards[1 - turn]
+                self.views[1 - turn].print(self.views[1 - turn].text('enemy turn'))
+
+                report = Report.NOT_VALID
+                while report == Report.NOT_VALID:
+                    pos = await shooter.get_player_input()
+                    report = target.shoot(pos)
+
+                for view in self.views:
+                    view.print(POSITIONS[pos])
+                    view.print_report(report)
+
+                if target.are_all_ships_destroyed():
+                    self.print_boards()
+                    shooter.print(shooter.text('win'))
+                    self.views[1 - turn].print(self.views[1 - turn].text('loose'))
+                    return
+                turn = 1 - turn
+        except EOFError:
+            for view in self.views:
+                view.print(OPPONENT_LEFT)
+
+
+class Server:
+    """ Hosts many matches in one event loop. All state of a match is kept by its
+        Game or Duel object. """
+
+    def __init__(self, susp_time = 0, turn_time = 0):
+        self.susp_time = susp_time
+        self.turn_time = turn_time
+        # player waiting for human opponent, future completed when their duel ends and task
+        # reading player's input until opponent joins (see ignore_input())
+        self.waiting = None
+        self.active_matches = 0
+        self.finished_matches = 0
+
+    async def handle(self, reader, writer):
+        connection = Connection(reader, writer)
+        try:
+            connection.write(WELCOME + '\n')
+            words = (await connection.read_line()).upper().split()
+            mode = words[0] if words else 'AI'
+            if len(words) > 1 and words[1].lower() in ('en', 'pl'):
+                connection.language = words[1].lower()
+
+            if mode == 'HUMAN':
+                await self.play_duel(connection)
+            else:
+                await self.play_ai(connection)
+        except (EOFError, ConnectionError):
+            pass
+        except Exception:
+            # error in one match mustn't stop the server, player is disconnected
+            log.exception('Match of %s failed', writer.get_extra_info('peername'))
+        finally:
+            if self.waiting is not None and self.waiting[0] is connection:
+                self.waiting = None
+            writer.close()
+
+    async def play_ai(self, connection):
+        # every match has its own generator of random numbers
+        game = Game(False, connection.language, self.susp_time, self.turn_time, False,
+                    connection.read_line, connection, random.Random())
+        self.active_matches += 1
+        try:
+            await game.run()
+        finally:
+            self.active_matches -= 1
+            self.finished_matches += 1
+
+    async def ignore_input(self, connection):
+        """ Read (and ignore) lines sent by player waiting for opponent. Return when player
+            disconnects, so dead connection is not paired with the next player. """
+        try:
+            while True:
+                await connection.read_line()
+        except (EOFError, ConnectionError):
+            pass
+
+    async def play_duel(self, connection):
+        if self.waiting is None:
+            # wait until other player joins (and cancels reading of input) or player leaves
+            finished = asyncio.get_running_loop().create_future()
+            reading = asyncio.create_task(self.ignore_input(connection))
+            self.waiting = (connection, finished, reading)
+            try:
+                await asyncio.wait((reading,))
+            finally:
+                reading.cancel()
+            if reading.cancelled():
+                # wait until the duel ends
+                await finished
+            return
+
+        opponent, finished, reading = self.waiting
+        self.waiting = None
+        # only the duel can read opponent's input
+        reading.cancel()
+        await asyncio.wait((reading,))
+        if not reading.cancelled():
+            # opponent has just left, wait for another one
+            await self.play_duel(connection)
+            return
+
+        self.active_matches += 1
+        try:
+            await Duel((opponent, connection), self.susp_time, self.turn_time).play()
+        finally:
+            self.active_matches -= 1
+            self.finished_matches += 1
+            finished.set_result(None)
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+async def load_test_client(host, port, latencies):
+    """ Play one match against AI sending random positions. Turn latency (time from sending
+        position to the next 'Your turn' prompt) is appended to latencies. """
+    reader, writer = await asyncio.open_connection(host, port)
+    positions = list(POSITIONS)
+    random.shuffle(positions)
+    sent = None
+    try:
+        await reader.readline()
+        writer.write(b'AI en\n')
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            line = line.decode().strip()
+            if line == TEXTS['your turn', 'en']:
+                if sent is not None:
+                    latencies.append(time.perf_counter() - sent)
+                writer.write(positions.pop().encode() + b'\n')
+                sent = time.perf_counter()
+            elif TEXTS['play again', 'en'] in line:
+                writer.write(b'N\n')
+    finally:
+        writer.close()
+
+
+async def load_test(host, port, matches, concurrency):
+    """ Play matches against server with given number of simultaneous clients.
+        Return matches per second and list of turn latencies. """
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def client():
+        async with semaphore:
+            await load_test_client(host, port, latencies)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(matches)))
+    return matches / (time.perf_counter() - start), latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Battleship game server.')
+    parser.add_argument('--host', default = 'localhost')
+    parser.add_argument('--port', type = int, default = 8888)
+    subparsers = parser.add_subparsers(dest = 'command', required = True)
+    serve = subparsers.add_parser('serve', help = 'run server')
+    serve.add_argument('--susp-time', type = float, default = 0)
+    serve.add_argument('--turn-time', type = float, default = 0)
+    test = subparsers.add_parser('load-test', help = 'play matches against running server')
+    test.add_argument('--matches', type = int, default = 1000)
+    test.add_argument('--concurrency', type = int, default = 100)
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        asyncio.run(Server(args.susp_time, args.turn_time).serve(args.host, args.port))
+        return
+
+    rate, latencies = asyncio.run(load_test(args.host, args.port, args.matches, args.concurrency))
+    latencies.sort()
+    print('Matches per second: {:.1f}'.format(rate))
+    if latencies:
+        print('Turn latency mean: {:.2f} ms'.format(sum(latencies) / len(latencies) * 1000))
+        for p in (50, 95, 99):
+            print('Turn latency P{}: {:.2f} ms'.format(p, latencies[int(p / 100 * (len(latencies) - 1))] * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,643 @@
+# Battleship - tests
+# Author: Jan Zalewski
+#
+# Run: python -m unittest test_battleship (or python -m pytest test_battleship.py)
+
+import asyncio, collections, io, os, random, subprocess, sys, tempfile, unittest
+
+import battleship
+from battleship import Cell_Set, Geometry, Indexed_Set, Report
+from game_archive import Archive_Reader, Game_Archive, INDEX_ENTRY, archive_games
+from game_record import Game_Record, Record_Reader, Record_Writer, record_games
+from ladder import Ladder, get_game_seeds
+from server import Server
+from tournament import Tournament_Stats, get_jobs, play_shard, tournament
+
+try:
+    import numpy as np
+    import battleship_numpy
+except ImportError:
+    np = None
+
+
+# prints results of games of all strategies, used to check that they don't depend on hash seed
+FINGERPRINT = """
+import battleship
+for strategy in battleship.Strategy:
+    n_games = 3 if strategy == battleship.Strategy.MONTE_CARLO else 20
+    for stats in battleship.simulate(n_games, 1, strategies = (strategy, battleship.Strategy.RANDOM),
+                                     opening_book = battleship.get_opening_book()):
+        print(stats.seed, stats.shots, stats.sink_order)
+"""
+
+# reads one line, then stops waiting for next one
+WAIT_FOR_INPUT = """
+import asyncio, sys, battleship_cli
+async def main():
+    print(await battleship_cli.read_input(), flush = True)
+    try:
+        await asyncio.wait_for(battleship_cli.read_input(), 0.2)
+    except asyncio.TimeoutError:
+        print('timeout', flush = True)
+asyncio.run(main())
+"""
+
+# ladder with strategy registered at runtime, played by workers started with spawn
+SPAWNED_LADDER = """
+import multiprocessing, battleship, ladder
+
+class First_Cell(battleship.Random_Hunt):
+    def get_shoot_position(self, board):
+        return next(i for i in range(board.geometry.area) if board.is_possible_position(i))
+
+if __name__ == '__main__':
+    battleship.register_strategy('FIRST_CELL', First_Cell)
+    multiprocessing.set_start_method('spawn')
+    results = ladder.Ladder(1)
+    results.run(4, ['FIRST_CELL', 'RANDOM'], processes = 2, shard_size = 2)
+    print(results.games['FIRST_CELL'], results.games['RANDOM'])
+"""
+
+
+class First_Cell(battleship.Random_Hunt):
+    """ Test strategy shooting the first possible cell. """
+
+    def get_shoot_position(self, board):
+        return next(i for i in range(board.geometry.area) if board.is_possible_position(i))
+
+
+class Reproducibility_Test(unittest.TestCase):
+
+    def test_same_seed_same_game(self):
+        for strategy in battleship.Strategy:
+            first, second = [battleship.play_game(7, strategies = (strategy, strategy)) for _ in range(2)]
+            self.assertEqual((first.shots, first.sink_order), (second.shots, second.sink_order))
+
+    def test_global_random_untouched(self):
+        state = random.getstate()
+        battleship.simulate(5, seed = 1)
+        self.assertEqual(random.getstate(), state)
+
+    def test_independent_of_hash_seed(self):
+        outputs = []
+        for hash_seed in ('1', '2'):
+            environment = dict(os.environ, PYTHONHASHSEED = hash_seed)
+            outputs.append(subprocess.run([sys.executable, '-c', FINGERPRINT], env = environment, check = True,
+                                          cwd = os.path.dirname(os.path.abspath(__file__)),
+                                          stdout = subprocess.PIPE).stdout)
+        self.assertEqual(outputs[0], outputs[1])
+
+
+class Monte_Carlo_Test(unittest.TestCase):
+
+    def test_other_ship_hit_while_finishing_one(self):
+        # in these games AI hits another ship before the first one sinks
+        for seed in (12736496262939004471, 6858376947525423350):
+            for board_class in (battleship.Board, battleship.Bit_Board):
+                stats = battleship.play_game(seed, board_class, (battleship.Strategy.MONTE_CARLO,) * 2)
+                self.assertEqual(sorted(stats.sink_order[stats.winner], reverse = True), list(battleship.FLEET))
+
+
+class Tournament_Test(unittest.TestCase):
+
+    def test_independent_of_processes(self):
+        expected = Tournament_Stats()
+        for job in get_jobs(200, 1, 30):
+            expected.merge(play_shard(job))
+        for processes in (1, 3):
+            stats = tournament(200, seed = 1, processes = processes, shard_size = 30)
+            self.assertEqual(stats.games, 200)
+            self.assertEqual((stats.wins, stats.first_wins, stats.histogram),
+                             (expected.wins, expected.first_wins, expected.histogram))
+
+    def test_options_passed_to_shards(self):
+        options = {'board_class' : battleship.Bit_Board, 'strategies' : (battleship.Strategy.PARITY, 'RANDOM'),
+                   'opening_book' : battleship.get_opening_book()}
+        expected = Tournament_Stats()
+        for seed, n_games, _ in get_jobs(60, 2, 20):
+            for stats in battleship.simulate(n_games, seed, **options):
+                expected.add(stats)
+        stats = tournament(60, seed = 2, processes = 2, shard_size = 20, **options)
+        self.assertEqual((stats.wins, stats.histogram), (expected.wins, expected.histogram))
+        self.assertNotEqual(stats.histogram, tournament(60, seed = 2, processes = 2, shard_size = 20).histogram)
+
+
+class Backend_Test(unittest.TestCase):
+
+    def test_same_reports(self):
+        rng = random.Random(5)
+        for _ in range(20):
+            fleet = battleship.get_random_fleet(rng)
+            boards = [board_class('', hidden = True, fleet = fleet) for board_class in (battleship.Board, battleship.Bit_Board)]
+            # every cell in random order, some of them twice (not valid shots)
+            cells = list(range(100)) + rng.sample(range(100), 20)
+            rng.shuffle(cells)
+            for cell in cells:
+                reports = [board.shoot(cell) for board in boards]
+                self.assertEqual(reports[0], reports[1])
+                self.assertEqual(boards[0].are_all_ships_destroyed(), boards[1].are_all_ships_destroyed())
+                # cells blocked around sunk ships too
+                self.assertEqual(*([board.is_possible_position(i) for i in range(100)] for board in boards))
+            self.assertEqual(sorted(boards[0].get_fleet()), sorted(boards[1].get_fleet()))
+
+
+class Strategy_Test(unittest.TestCase):
+
+    def test_parity_hunt(self):
+        board = battleship.Board('', hidden = True, rng = random.Random(1))
+        hunter = battleship.Parity_Hunt(random.Random(2))
+        # the smallest ship larger than 1 has size 2, so only cells of one colour are shot
+        parities = {sum(battleship.COORDS[hunter.get_shoot_position(board)]) % 2 for _ in range(50)}
+        self.assertEqual(len(parities), 1)
+        # ships of size 1 are left, any possible cell can be shot
+        for size in battleship.FLEET:
+            if size > 1:
+                hunter.update(0, Report.DESTROYED, [0] * size)
+        parities = {sum(battleship.COORDS[hunter.get_shoot_position(board)]) % 2 for _ in range(50)}
+        self.assertEqual(parities, {0, 1})
+
+        stats = battleship.play_game(3, strategies = (battleship.Strategy.PARITY, battleship.Strategy.PARITY))
+        self.assertEqual(stats.hits[stats.winner], sum(battleship.FLEET))
+
+    def test_register_strategy(self):
+        battleship.register_strategy('FIRST_CELL', First_Cell)
+        self.addCleanup(battleship.STRATEGIES.pop, 'FIRST_CELL')
+        self.assertEqual(battleship.get_strategy_name('FIRST_CELL'), 'FIRST_CELL')
+        self.assertEqual(battleship.get_strategy_name(battleship.Strategy.PARITY), 'PARITY')
+        stats = battleship.play_game(4, strategies = ('FIRST_CELL', 'FIRST_CELL'), record = True)
+        self.assertEqual(stats.shot_log[0][0], 0)
+        self.assertEqual(stats.hits[stats.winner], sum(battleship.FLEET))
+
+
+class AI_Batch_Test(unittest.TestCase):
+
+    def test_same_as_single_games(self):
+        batch = battleship.AI_Batch.new(20, seed = 1, strategy = battleship.Strategy.DENSITY)
+        fleets = [board.get_fleet() for _, board in batch.games]
+        shots = list(batch.run())
+        # games of the batch can be played one by one with generators drawn the same way
+        seeds = random.Random(1)
+        for fleet, count in zip(fleets, shots):
+            rng = random.Random(seeds.getrandbits(64))
+            ai = battleship.Player_AI(battleship.Strategy.DENSITY, rng)
+            board = battleship.Board('', hidden = True, rng = rng)
+            self.assertEqual(board.get_fleet(), fleet)
+            played = 0
+            while not board.are_all_ships_destroyed():
+                ai.get_shoot_position(board)
+                ai.shoot(board)
+                played += 1
+            self.assertEqual(played, count)
+        self.assertTrue(batch.is_finished())
+
+    def test_shoot_and_choose_separately(self):
+        batch = battleship.AI_Batch.new(10, seed = 2)
+        with self.assertRaises(RuntimeError):
+            batch.shoot()
+        while not batch.is_finished():
+            positions = list(batch.get_shoot_positions())
+            reports = batch.shoot()
+            self.assertNotIn(Report.NOT_VALID, reports)
+            self.assertTrue(all((position is None) == (report is None) for position, report in zip(positions, reports)))
+            # positions have to be chosen again
+            with self.assertRaises(RuntimeError):
+                batch.shoot()
+        self.assertEqual(batch.shots, battleship.AI_Batch.new(10, seed = 2).run())
+
+
+@unittest.skipIf(np is None, 'NumPy is not installed')
+class NumPy_Test(unittest.TestCase):
+
+    def test_choose_shots_same_as_board_batch(self):
+        for board_class in (battleship.Board, battleship.Bit_Board):
+            batch = battleship_numpy.Board_Batch(6, seed = 3)
+            # batch draws fleets the same way
+            fleets = random.Random(3)
+            boards = [board_class('', hidden = True, fleet = battleship.get_random_fleet(fleets)) for _ in range(6)]
+            rng = np.random.default_rng()
+            while not batch.done.all():
+                active = np.nonzero(~batch.done)[0].tolist()
+                shot, blocked, hits, remaining = battleship_numpy.get_states([boards[i] for i in active])
+                # boards mark cells around sunk ships as missed, batch only blocks them
+                for state, expected in ((shot | blocked, batch.shots | batch.blocked), (blocked, batch.blocked),
+                                        (hits, batch.hits), (remaining, batch.remaining)):
+                    self.assertTrue((state == expected[active]).all())
+                # with the same tie breaking both choose the same cells
+                rng.bit_generator.state = batch.rng.bit_generator.state
+                cells = batch.choose()
+                self.assertEqual(battleship_numpy.choose_shots([boards[i] for i in active], rng),
+                                 cells[active].tolist())
+                reports = batch.shoot(cells)
+                for i in active:
+                    self.assertEqual(boards[i].shoot(int(cells[i])).value, reports[i])
+            self.assertTrue(all(board.are_all_ships_destroyed() for board in boards))
+
+    def test_fit_counts_same_as_density(self):
+        for seed in range(3):
+            rng = random.Random(seed)
+            board = battleship.Board('', hidden = True, rng = rng)
+            ai = battleship.Player_AI(battleship.Strategy.DENSITY, rng)
+            hunter = ai.hunter
+            hunting_states = 0
+            while not board.are_all_ships_destroyed():
+                # without hit ships both count placements of remaining ships avoiding shot and blocked cells
+                if not ai.hit_not_sank:
+                    shot, blocked, hits, remaining = battleship_numpy.get_states([board])
+                    density = battleship_numpy.fit_counts((shot | blocked).reshape(1, 10, 10), hits.reshape(1, 10, 10),
+                                                          remaining)
+                    expected = [sum(count * hunter.cover[size][cell] for size, count in hunter.remaining.items())
+                                for cell in range(100)]
+                    self.assertEqual(density.reshape(100).tolist(), expected)
+                    hunting_states += 1
+                ai.get_shoot_position(board)
+                ai.shoot(board)
+            self.assertGreater(hunting_states, 10)
+
+
+class Ladder_Test(unittest.TestCase):
+
+    NAMES = ['PARITY', 'RANDOM']
+
+    def test_game_seeds(self):
+        seeds = get_game_seeds(1, 'PARITY', 'RANDOM', 0, 10)
+        self.assertEqual(get_game_seeds(1, 'PARITY', 'RANDOM', 4, 6), seeds[4:])
+        self.assertNotEqual(get_game_seeds(2, 'PARITY', 'RANDOM', 0, 10), seeds)
+        self.assertNotEqual(get_game_seeds(1, 'PARITY', 'DENSITY', 0, 10), seeds)
+
+    def test_pairs(self):
+        names = self.NAMES + ['DENSITY']
+        ladder = Ladder(1)
+        ladder.run(6, names, processes = 1, shard_size = 4)
+        self.assertEqual(set(ladder.pairs), {'DENSITY:PARITY', 'DENSITY:RANDOM', 'PARITY:RANDOM'})
+        self.assertTrue(all(played == 6 and 0 <= won <= 6 for played, won in ladder.pairs.values()))
+        self.assertEqual(ladder.games, {name : 12 for name in names})
+        # ratings are only moved between strategies
+        self.assertAlmostEqual(sum(ladder.ratings.values()), 3 * 1500)
+        self.assertEqual([name for name, _ in ladder.get_ranking()],
+                         sorted(names, key = lambda name: -ladder.ratings[name]))
+
+    def test_resume(self):
+        expected = Ladder(1)
+        expected.run(7, self.NAMES, processes = 1, shard_size = 3)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'ladder.json')
+            ladder = Ladder(1)
+            ladder.run(4, self.NAMES, processes = 1, shard_size = 3)
+            ladder.save(path)
+            ladder = Ladder.load(path)
+            ladder.run(7, self.NAMES, processes = 2, shard_size = 3)
+        self.assertEqual(ladder.games, expected.games)
+        self.assertEqual({pair : list(result) for pair, result in ladder.pairs.items()},
+                         {pair : list(result) for pair, result in expected.pairs.items()})
+        for name in self.NAMES:
+            self.assertAlmostEqual(ladder.ratings[name], expected.ratings[name])
+
+    def test_runtime_strategy_in_spawned_workers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'spawned_ladder.py')
+            with open(path, 'w') as file:
+                file.write(SPAWNED_LADDER)
+            environment = dict(os.environ, PYTHONPATH = os.path.dirname(os.path.abspath(__file__)))
+            output = subprocess.run([sys.executable, path], env = environment, check = True,
+                                    stdout = subprocess.PIPE, timeout = 60).stdout
+        self.assertEqual(output.split(), [b'4', b'4'])
+
+
+class Set_Test(unittest.TestCase):
+
+    def check(self, items, expected):
+        self.assertEqual(len(items), len(expected))
+        self.assertEqual(sorted(items), sorted(expected))
+        for item in range(300):
+            self.assertEqual(item in items, item in expected)
+
+    def test_add_remove_choice(self):
+        rng = random.Random(1)
+        for items in (Indexed_Set(), Cell_Set(300)):
+            expected = set()
+            for _ in range(2000):
+                item = rng.randrange(300)
+                if rng.random() < 0.5:
+                    items.add(item)
+                    expected.add(item)
+                elif item in expected:
+                    items.remove(item)
+                    expected.remove(item)
+                else:
+                    with self.assertRaises(KeyError):
+                        items.remove(item)
+                    items.discard(item)
+                self.check(items, expected)
+                if expected:
+                    self.assertIn(items.choice(rng), expected)
+            items.clear()
+            self.check(items, set())
+            with self.assertRaises(IndexError):
+                items.choice(rng)
+
+    def test_choice_is_uniform(self):
+        rng = random.Random(2)
+        items = Cell_Set.full(10)
+        items.remove(3)
+        counts = [0] * 10
+        for _ in range(9000):
+            counts[items.choice(rng)] += 1
+        self.assertEqual(counts[3], 0)
+        self.assertTrue(all(800 < count < 1200 for i, count in enumerate(counts) if i != 3))
+
+    def test_cell_set_same_as_indexed_set(self):
+        # boards give the same games with both of them
+        rng = random.Random(3)
+        cells, items = Cell_Set.full(100), Indexed_Set(range(100))
+        while items:
+            item = items.choice(rng)
+            self.assertEqual(list(cells), list(items))
+            items.remove(item)
+            cells.remove(item)
+        self.assertEqual(len(cells), 0)
+        self.assertNotIn(-1, cells)
+        self.assertNotIn(100, cells)
+
+    def test_large_sizes(self):
+        for size in (255, 256, 70000):
+            cells = Cell_Set.full(size)
+            cells.remove(size - 1)
+            cells.remove(0)
+            self.assertEqual(cells.cells[0], size - 2)
+            self.assertNotIn(size - 1, cells)
+
+
+class Unmasked_Geometry(Geometry):
+    """ Small board placing ships like large boards do, without bit masks. """
+    MASK_AREA = 0
+
+
+class Geometry_Test(unittest.TestCase):
+
+    def test_fleet_not_fitting(self):
+        with self.assertRaises(ValueError):
+            Geometry(3, 3, (3, 3, 3))
+        with self.assertRaises(ValueError):
+            Geometry(100, 100, (1,) * 3000)
+        # passes the quick check, but there is no legal placement
+        with self.assertRaises(ValueError):
+            battleship.Board('', geometry = Geometry(4, 4, (3, 3, 3)))
+
+    def test_other_board(self):
+        geometry = Geometry(7, 5, (3, 2, 1))
+        board = battleship.Board('', geometry = geometry)
+        self.assertEqual(sorted(len(ship) for ship in board.get_fleet()), [1, 2, 3])
+        stats = battleship.play_game(1, geometry = geometry)
+        self.assertEqual(stats.hits[stats.winner], 6)
+
+    def test_random_placement_distribution(self):
+        rng = random.Random(1)
+        # ships longer than board's width only have vertical placements
+        for width, height in ((1, 5), (2, 4), (4, 2)):
+            geometry = Unmasked_Geometry(width, height, (3,))
+            expected = {placement.cells for placement in Geometry(width, height, (3,)).get_placements()[3]}
+            counts = collections.Counter(geometry.get_random_fleet(rng)[0].cells for _ in range(3000))
+            self.assertEqual(set(counts), expected)
+            for count in counts.values():
+                self.assertAlmostEqual(count / 3000, 1 / len(expected), delta = 0.05)
+
+    def test_ship_retries_counted(self):
+        geometry = Unmasked_Geometry(5, 5, (3, 2, 2, 1))
+        metrics = battleship.enable_metrics()
+        try:
+            for seed in range(20):
+                geometry.get_random_fleet(random.Random(seed))
+        finally:
+            battleship.disable_metrics()
+        self.assertEqual(metrics.fleets, 20)
+        self.assertGreater(metrics.ship_retries, 0)
+
+
+class Game_Record_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.games = battleship.simulate(20, seed = 1, record = True)
+        self.records = [Game_Record.from_stats(stats) for stats in self.games]
+
+    def test_bytes_round_trip(self):
+        for record in self.records:
+            data = record.to_bytes()
+            copy, size = Game_Record.from_bytes(data)
+            self.assertEqual(size, len(data))
+            self.assertEqual(copy.seed, record.seed)
+            self.assertEqual((copy.first, copy.winner), (record.first, record.winner))
+            self.assertEqual([list(fleet) for fleet in copy.fleets], [list(fleet) for fleet in record.fleets])
+            self.assertEqual(copy.shots, record.shots)
+            self.assertEqual(copy.reports, record.reports)
+
+    def test_replay(self):
+        for stats, record in zip(self.games, self.records):
+            boards = record.replay()
+            # loser's board has all ships destroyed
+            self.assertTrue(boards[1 - stats.winner].are_all_ships_destroyed())
+            self.assertFalse(boards[stats.winner].are_all_ships_destroyed())
+            # no shot was replayed yet
+            shot = battleship.CELL_MISSED | battleship.CELL_DESTROYED
+            for board in record.replay(turn = 0):
+                self.assertFalse(any(state & shot for state in board.cells))
+
+    def test_replay_mismatch(self):
+        record = self.records[0]
+        record.reports[0] = Report.DESTROYED if record.reports[0] != Report.DESTROYED else Report.MISSED
+        with self.assertRaises(ValueError):
+            record.replay()
+
+    def test_writer_and_reader(self):
+        file = io.BytesIO()
+        writer = Record_Writer(file)
+        for record in self.records:
+            writer.write(record)
+        file.seek(0)
+        reader = Record_Reader(file)
+        reader.CHUNK_SIZE = 100
+        self.assertEqual([record.seed for record in reader], [record.seed for record in self.records])
+
+    def test_truncated_file(self):
+        data = io.BytesIO()
+        Record_Writer(data).write(self.records[0])
+        with self.assertRaises(ValueError):
+            list(Record_Reader(io.BytesIO(data.getvalue()[:-1])))
+
+    def test_other_geometry_rejected(self):
+        geometry = Geometry(7, 5, (3, 2, 1))
+        stats = battleship.play_game(1, record = True, geometry = geometry)
+        with self.assertRaises(ValueError):
+            Game_Record.from_stats(stats).to_bytes()
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(ValueError):
+                record_games(os.path.join(directory, 'games.bin'), 3, geometry = geometry)
+
+
+class Game_Archive_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'games.bin')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_append_and_read(self):
+        games = battleship.simulate(30, seed = 2, record = True)
+        with Game_Archive(self.path) as archive:
+            for i, stats in enumerate(games):
+                self.assertEqual(archive.append(Game_Record.from_stats(stats)), i)
+                # every appended game can be read while archive is still being written
+                with Archive_Reader(self.path) as reader:
+                    self.assertEqual(len(reader), i + 1)
+                    self.assertEqual(reader[i].seed, stats.seed)
+
+        with Archive_Reader(self.path) as reader:
+            self.assertEqual(len(reader), len(games))
+            self.assertEqual([reader[i].shots for i in range(len(games))],
+                             [[cell for cell, _ in stats.shot_log] for stats in games])
+            with self.assertRaises(IndexError):
+                reader[len(games)]
+
+            shots = [sum(stats.shots) for stats in games]
+            limit = sorted(shots)[len(shots) // 2]
+            self.assertEqual(list(reader.filter(max_shots = limit)),
+                             [i for i, count in enumerate(shots) if count <= limit])
+            self.assertEqual(list(reader.filter(min_shots = limit, winner = 1)),
+                             [i for i, stats in enumerate(games) if shots[i] >= limit and stats.winner == 1])
+
+    def test_reopen_appends(self):
+        archive_games(self.path, 5, seed = 3)
+        archive_games(self.path, 5, seed = 4)
+        with Archive_Reader(self.path) as reader:
+            self.assertEqual(len(reader), 10)
+            self.assertEqual(reader[5].seed, battleship.simulate(1, seed = 4)[0].seed)
+
+    def test_incomplete_records_ignored(self):
+        archive_games(self.path, 5, seed = 3)
+        # entry of record that didn't reach data file and half written entry
+        with open(self.path, 'rb') as file:
+            size = len(file.read())
+        with open(self.path + '.idx', 'ab') as file:
+            file.write(INDEX_ENTRY.pack(size, 100, 0, 50) + b'\0\0')
+        with Archive_Reader(self.path) as reader:
+            self.assertEqual(len(reader), 5)
+            self.assertEqual(list(reader.filter()), list(range(5)))
+            with self.assertRaises(IndexError):
+                reader[5]
+
+    def test_reopen_after_partial_entry(self):
+        archive_games(self.path, 5, seed = 3)
+        with open(self.path, 'rb') as file:
+            size = len(file.read())
+        with open(self.path + '.idx', 'ab') as file:
+            file.write(INDEX_ENTRY.pack(size, 100, 0, 50) + b'\0\0')
+        # new games follow complete ones instead of lost entry and half written one
+        archive_games(self.path, 2, seed = 4)
+        with open(self.path + '.idx', 'rb') as file:
+            self.assertEqual(len(file.read()), 7 * INDEX_ENTRY.size)
+        with Archive_Reader(self.path) as reader:
+            self.assertEqual(len(reader), 7)
+            self.assertEqual([reader[i].seed for i in range(5, 7)],
+                             [stats.seed for stats in battleship.simulate(2, seed = 4)])
+
+
+class Terminal_Output(io.StringIO):
+
+    def isatty(self):
+        return True
+
+
+class Game_Test(unittest.TestCase):
+
+    def play(self, out):
+        async def read_line():
+            return 'N'
+        game = battleship.Game(player_ai = True, susp_time = 0, turn_time = 0, ansi_renderer = True,
+                               read_line = read_line, out = out, rng = random.Random(1))
+        asyncio.run(game.run())
+        return out.getvalue()
+
+    def test_position_with_other_digits(self):
+        lines = iter(['A\u00b2', 'B\u0663', 'K1', 'C3'])
+        async def read_line():
+            return next(lines)
+        game = battleship.Game(read_line = read_line, out = io.StringIO())
+        self.assertEqual(asyncio.run(game.get_player_input()), battleship.to_index((2, 2)))
+
+    def test_renderer_only_in_terminal(self):
+        self.assertNotIn('\x1b', self.play(io.StringIO()))
+        self.assertIn('\x1b[2J', self.play(Terminal_Output()))
+
+    def test_exit_while_waiting_for_input(self):
+        # stdin stays open, so line is never read; process has to exit anyway
+        process = subprocess.Popen([sys.executable, '-c', WAIT_FOR_INPUT], stdin = subprocess.PIPE,
+                                   stdout = subprocess.PIPE, cwd = os.path.dirname(os.path.abspath(__file__)))
+        try:
+            process.stdin.write(b'A1\n')
+            process.stdin.flush()
+            process.wait(timeout = 10)
+            self.assertEqual(process.stdout.read().split(), [b'A1', b'timeout'])
+        finally:
+            process.kill()
+            process.stdin.close()
+            process.stdout.close()
+
+
+class Server_Test(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = Server()
+        self.listener = await asyncio.start_server(self.server.handle, 'localhost', 0)
+        self.port = self.listener.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.listener.close()
+        await self.listener.wait_closed()
+
+    async def wait_until(self, condition):
+        """ Let server run until condition is true. """
+        async def poll():
+            while not condition():
+                await asyncio.sleep(0.001)
+        await asyncio.wait_for(poll(), 5)
+
+    async def connect(self, mode):
+        reader, writer = await asyncio.open_connection('localhost', self.port)
+        await reader.readline()
+        writer.write(mode.encode() + b'\n')
+        await writer.drain()
+        return reader, writer
+
+    async def test_waiting_player_leaves(self):
+        _, writer = await self.connect('HUMAN en')
+        await self.wait_until(lambda: self.server.waiting is not None)
+        writer.close()
+        await self.wait_until(lambda: self.server.waiting is None)
+
+        # the next players are paired with each other
+        _, first = await self.connect('HUMAN en')
+        await self.wait_until(lambda: self.server.waiting is not None)
+        self.assertEqual(self.server.active_matches, 0)
+        _, second = await self.connect('HUMAN en')
+        await self.wait_until(lambda: self.server.active_matches == 1)
+        self.assertIsNone(self.server.waiting)
+        first.close()
+        second.close()
+        await self.wait_until(lambda: self.server.finished_matches == 1)
+        self.assertEqual(self.server.active_matches, 0)
+
+    async def test_error_in_match_logged(self):
+        async def play_ai(connection):
+            raise RuntimeError('broken match')
+        self.server.play_ai = play_ai
+        with self.assertLogs('server', 'ERROR') as logs:
+            reader, writer = await self.connect('AI en')
+            # player is disconnected
+            self.assertEqual(await asyncio.wait_for(reader.read(), 5), b'')
+        self.assertIn('broken match', logs.output[0])
+        writer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+# Battleship - parallel AI vs AI tournament
+# Author: Jan Zalewski
+
+import argparse, multiprocessing, random
+
+import battleship
+
+
+class Tournament_Stats:
+    """ Streaming aggregation of AI vs AI games. Shots to win are kept as histogram,
+        so percentiles are exact and memory doesn't grow with number of games. """
+
+    def __init__(self):
+        self.games = 0
+        # number of games won by player's AI (index 0) and enemy's AI (index 1)
+        self.wins = [0, 0]
+        # number of games won by AI that shot first
+        self.first_wins = 0
+        # shots to win -> number of games
+        self.histogram = {}
+        self.total_shots = 0
+
+    def __repr__(self):
+        return 'Tournament_Stats(games={}, win_rate={:.4f}, mean={:.2f}, median={})'.format(
+            self.games, self.win_rate(), self.mean(), self.percentile(50))
+
+    def add(self, stats):
+        """ Add result of single game (Game_Stats). """
+        shots = stats.shots_to_win()
+        self.games += 1
+        self.wins[stats.winner] += 1
+        if stats.winner == stats.first:
+            self.first_wins += 1
+        self.histogram[shots] = self.histogram.get(shots, 0) + 1
+        self.total_shots += shots
+
+    def merge(self, other):
+        """ Add results aggregated by other Tournament_Stats object. """
+        self.games += other.games
+        self.wins[0] += other.wins[0]
+        self.wins[1] += other.wins[1]
+        self.first_wins += other.first_wins
+        for shots, count in other.histogram.items():
+            self.histogram[shots] = self.histogram.get(shots, 0) + count
+        self.total_shots += other.total_shots
+
+    def win_rate(self, index = 0):
+        """ Return fraction of games won by AI with given index. """
+        return self.wins[index] / self.games if self.games else 0.0
+
+    def first_win_rate(self):
+        """ Return fraction of games won by AI that shot first. """
+        return self.first_wins / self.games if self.games else 0.0
+
+    def mean(self):
+        """ Return mean number of shots needed to win. """
+        return self.total_shots / self.games if self.games else 0.0
+
+    def percentile(self, p):
+        """ Return smallest number of shots to win that covers p percent of games. """
+        if not self.games:
+            return None
+        threshold = p / 100 * self.games
+        count = 0
+        for shots in sorted(self.histogram):
+            count += self.histogram[shots]
+            if count >= threshold:
+                return shots
+        return max(self.histogram)
+
+
+def play_shard(job):
+    """ Worker function. Play games of single shard and return their aggregated stats. """
+    seed, n_games, options = job
+    stats = Tournament_Stats()
+    for game_stats in battleship.iter_games(n_games, seed, **options):
+        stats.add(game_stats)
+    return stats
+
+
+def get_jobs(n_games, seed, shard_size, **options):
+    """ Split games into shards. Every shard gets seed drawn from generator initialized
+        with given seed, so results don't depend on number of processes or shards order.
+        Options (board_class, strategies, opening_book, geometry - see battleship.simulate())
+        are passed to every shard. """
+    seeds = random.Random(seed)
+    for start in range(0, n_games, shard_size):
+        yield seeds.getrandbits(64), min(shard_size, n_games - start), options
+
+
+def tournament(n_games, seed = None, processes = None, shard_size = 1000, callback = None, **options):
+    """ Play n_games AI vs AI games using pool of processes (by default one per core).
+        Games are played with given options (see get_jobs()). Results are merged as soon
+        as each shard finishes; optional callback is called with current Tournament_Stats
+        after every merged shard. Return Tournament_Stats. """
+    stats = Tournament_Stats()
+    with multiprocessing.Pool(processes) as pool:
+        for shard_stats in pool.imap_unordered(play_shard, get_jobs(n_games, seed, shard_size, **options)):
+            stats.merge(shard_stats)
+            if callback is not None:
+                callback(stats)
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Play AI vs AI battleship tournament.')
+    parser.add_argument('games', type = int, help = 'number of games')
+    parser.add_argument('--seed', type = int, default = None)
+    parser.add_argument('--processes', type = int, default = None, help = 'default: number of cores')
+    parser.add_argument('--shard-size', type = int, default = 1000)
+    parser.add_argument('--backend', choices = ('Board', 'Bit_Board'), default = 'Board')
+    parser.add_argument('--strategies', nargs = 2, choices = [strategy.name for strategy in battleship.Strategy],
+                        default = ('RANDOM', 'RANDOM'), help = "player's and enemy's AI strategy")
+    parser.add_argument('--opening-book', action = 'store_true', help = 'both AIs use opening book')
+    args = parser.parse_args()
+
+    stats = tournament(args.games, args.seed, args.processes, args.shard_size,
+                       board_class = getattr(battleship, args.backend),
+                       strategies = tuple(battleship.Strategy[name] for name in args.strategies),
+                       opening_book = battleship.get_opening_book() if args.opening_book else None)
+    print('Games:', stats.games)
+    print('Player AI win rate: {:.4f}'.format(stats.win_rate(0)))
+    print('First shooter win rate: {:.4f}'.format(stats.first_win_rate()))
+    print('Mean shots to win: {:.2f}'.format(stats.mean()))
+    for p in (5, 25, 50, 75, 95):
+        print('P{} shots to win: {}'.format(p, stats.percentile(p)))
+
+
+if __name__ == '__main__':
+    main()